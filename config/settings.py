@@ -77,6 +77,8 @@ SPECTACULAR_SETTINGS = {
 
 
 MIDDLEWARE = [
+    'sound.middleware.MetricsMiddleware',
+    'sound.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -123,6 +125,39 @@ DATABASES = {
     }
 }
 
+# Поиск на Postgres использует триграммные lookups из django.contrib.postgres
+if 'postgresql' in DATABASES['default']['ENGINE']:
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+
+# Метрики Prometheus на /metrics. Процессы gunicorn пишут значения в свои файлы в METRICS_DIR, выгрузка их суммирует;
+# без METRICS_DIR видны только метрики отвечающего процесса. Выгрузка требует Bearer токен METRICS_TOKEN;
+# без токена /metrics открыт только при DEBUG.
+METRICS_ENABLED = bool(int(os.environ.get('METRICS_ENABLED', 1)))
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Замер SQL и времени запросов в заголовке Server-Timing; запросы дольше порога пишутся в лог sound.timing.
+REQUEST_TIMING = bool(int(os.environ.get('REQUEST_TIMING', 0)))
+REQUEST_TIMING_SLOW_MS = int(os.environ.get('REQUEST_TIMING_SLOW_MS', 500))
+
+# Кеш: locmem действует в пределах процесса, file — общий для всех процессов на машине (CACHE_LOCATION).
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')],
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))},
+    }
+}
+
+# Время жизни закешированных ответов каталога в секундах, устаревшие сбрасываются версиями раньше.
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -166,6 +201,71 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 FILE_UPLOAD_HANDLERS= ["django.core.files.uploadhandler.TemporaryFileUploadHandler"]
 
+# Хранение загрузок по SHA-256 содержимого (media/cas/): дедупликация и неизменяемые URL.
+MEDIA_CONTENT_ADDRESSED = bool(int(os.environ.get('MEDIA_CONTENT_ADDRESSED', 0)))
+
+# Отдача аудио: через nginx (X-Accel-Redirect на внутренний location) или самим Django.
+MEDIA_ACCEL_REDIRECT = bool(int(os.environ.get('MEDIA_ACCEL_REDIRECT', 0)))
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/mp3/')
+
+# Подписанные ссылки на аудио (stream_url) и сегменты HLS: nginx проверяет их модулем secure_link с тем же
+# секретом и отдаёт файл без Django; другого публичного пути к аудио в nginx нет, без секрета он не запускается.
+# Без секрета (разработка без nginx) stream_url возвращает обычную ссылку streaming_title.
+STREAM_URL_SECRET = os.environ.get('STREAM_URL_SECRET', '')
+STREAM_URL_PREFIX = os.environ.get('STREAM_URL_PREFIX', '/stream/')
+STREAM_URL_TTL = int(os.environ.get('STREAM_URL_TTL', 3600))
+
+# Длительность сегментов HLS в секундах.
+HLS_SEGMENT_DURATION = int(os.environ.get('HLS_SEGMENT_DURATION', 10))
+
+# Уменьшенные копии обложек и аватаров: стороны в пикселях и предельный размер кеша на диске.
+THUMBNAIL_SIZES = (64, 200, 500)
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get('THUMBNAIL_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+
+# Докачиваемая загрузка аудио частями: предельный размер файла и одной части в байтах.
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 500 * 1024 * 1024))
+UPLOAD_CHUNK_MAX_SIZE = int(os.environ.get('UPLOAD_CHUNK_MAX_SIZE', 50 * 1024 * 1024))
+# Секунды без новых частей, после которых загрузку отменяет expire_uploads, и число открытых загрузок пользователя.
+UPLOAD_TTL = int(os.environ.get('UPLOAD_TTL', 24 * 60 * 60))
+UPLOAD_MAX_OPEN = int(os.environ.get('UPLOAD_MAX_OPEN', 5))
+
+# Подсказки при наборе: снимок индекса (python manage.py rebuild_suggest_index) и период проверки его обновления в секундах.
+SUGGEST_SNAPSHOT_PATH = os.environ.get('SUGGEST_SNAPSHOT_PATH', os.path.join(BASE_DIR, 'suggest_index.json'))
+SUGGEST_RELOAD_INTERVAL = int(os.environ.get('SUGGEST_RELOAD_INTERVAL', 60))
+
+# Лента подписок: авторам с большим числом подписчиков записи не рассылаются, а подтягиваются при чтении ленты.
+FEED_FANOUT_MAX_FOLLOWERS = int(os.environ.get('FEED_FANOUT_MAX_FOLLOWERS', 10000))
+FEED_FANOUT_BATCH_SIZE = int(os.environ.get('FEED_FANOUT_BATCH_SIZE', 1000))
+FEED_BACKFILL_SIZE = int(os.environ.get('FEED_BACKFILL_SIZE', 50))
+FEED_PULL_INTERVAL = int(os.environ.get('FEED_PULL_INTERVAL', 30))
+
+# Прослушивания: размер буфера процесса, период его записи в базу и окно дедупликации в секундах, срок хранения событий в днях.
+LISTEN_BUFFER_SIZE = int(os.environ.get('LISTEN_BUFFER_SIZE', 500))
+LISTEN_FLUSH_INTERVAL = int(os.environ.get('LISTEN_FLUSH_INTERVAL', 10))
+# Пачка, которую база не приняла за столько попыток подряд, отбрасывается; буфер не растёт сверх LISTEN_BUFFER_MAX.
+LISTEN_FLUSH_MAX_ATTEMPTS = int(os.environ.get('LISTEN_FLUSH_MAX_ATTEMPTS', 5))
+LISTEN_BUFFER_MAX = int(os.environ.get('LISTEN_BUFFER_MAX', 10 * LISTEN_BUFFER_SIZE))
+LISTEN_DEDUP_WINDOW = int(os.environ.get('LISTEN_DEDUP_WINDOW', 30 * 60))
+LISTEN_RETENTION_DAYS = int(os.environ.get('LISTEN_RETENTION_DAYS', 90))
+
+# Чарты (python manage.py refresh_charts): вес добавления в плейлист относительно прослушивания, длина чарта, время кеширования ответа в секундах.
+CHART_LIKE_WEIGHT = int(os.environ.get('CHART_LIKE_WEIGHT', 5))
+CHART_SIZE = int(os.environ.get('CHART_SIZE', 100))
+CHART_CACHE_TIMEOUT = int(os.environ.get('CHART_CACHE_TIMEOUT', 60))
+
+# Похожие аудиозаписи (python manage.py build_similar_titles): длина списка и предельная длина учитываемого плейлиста.
+SIMILAR_TITLES_COUNT = int(os.environ.get('SIMILAR_TITLES_COUNT', 20))
+SIMILAR_MAX_PLAYLIST_SIZE = int(os.environ.get('SIMILAR_MAX_PLAYLIST_SIZE', 500))
+
+# Предельное число аудиозаписей в одном запросе добавления, удаления или переноса в плейлисте.
+PLAYLIST_BATCH_SIZE = int(os.environ.get('PLAYLIST_BATCH_SIZE', 1000))
+
+# Очередь фоновой обработки медиафайлов (python manage.py run_media_worker).
+MEDIA_WORKER_PROCESSES = int(os.environ.get('MEDIA_WORKER_PROCESSES', 2))
+MEDIA_JOB_MAX_ATTEMPTS = int(os.environ.get('MEDIA_JOB_MAX_ATTEMPTS', 3))
+MEDIA_JOB_RETRY_DELAY = int(os.environ.get('MEDIA_JOB_RETRY_DELAY', 30))
+MEDIA_JOB_TIMEOUT = int(os.environ.get('MEDIA_JOB_TIMEOUT', 600))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
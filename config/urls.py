@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from sound.views import metrics, stream, thumbnail
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path(f'{settings.MEDIA_URL.lstrip("/")}thumbs/<path:name>', thumbnail, name='thumbnail'),
+    path('metrics', metrics, name='metrics'),
+    path(f'{settings.STREAM_URL_PREFIX.strip("/")}/<path:name>', stream, name='stream'),
 
     path('api/v1/auth/', include('djoser.urls.jwt')),
     path('api/v1/auth/', include('social_django.urls', namespace='social')),
@@ -1,4 +1,6 @@
 #!/bin/bash
 python manage.py makemigrations --noinput
 python manage.py migrate --noinput
+# Файлы метрик прошлого запуска сбрасываются, иначе счётчики продолжатся с их значений.
+if [ -n "$METRICS_DIR" ]; then rm -rf "$METRICS_DIR" && mkdir -p "$METRICS_DIR"; fi
 gunicorn config.wsgi:application --bind 0.0.0.0:8000
\ No newline at end of file
@@ -0,0 +1,11 @@
+#!/bin/sh
+# Сборка location /stream/ с секретом подписанных ссылок из окружения.
+# Без секрета nginx не запускается: с пустым секретом подпись может посчитать любой.
+set -e
+
+if [ -z "$STREAM_URL_SECRET" ]; then
+    echo "$0: STREAM_URL_SECRET не задан" >&2
+    exit 1
+fi
+export STREAM_URL_TTL="${STREAM_URL_TTL:-3600}"
+envsubst '${STREAM_URL_SECRET} ${STREAM_URL_TTL}' < /etc/nginx/stream.conf.template > /etc/nginx/stream.conf
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:56
+
+import django.core.validators
+from django.db import migrations, models
+import oauth.services.services
+import sound.services.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oauth', '0003_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=sound.services.storage.get_media_storage, upload_to=oauth.services.services.get_avatar_upload_path, validators=[django.core.validators.validate_image_file_extension, oauth.services.services.validate_image_size]),
+        ),
+    ]
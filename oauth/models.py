@@ -3,6 +3,7 @@ from django.core.validators import validate_image_file_extension
 from django.db import models
 
 from oauth.services.services import get_avatar_upload_path, validate_image_size
+from sound.services.storage import get_media_storage
 
 
 class CustomUserManager(BaseUserManager):
@@ -40,8 +41,13 @@ class CustomUser(AbstractBaseUser):
     city = models.CharField(max_length=256, blank=True)
     bio = models.TextField(max_length=1024, blank=True)
     join_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    titles_count = models.PositiveIntegerField(default=0, editable=False)
     avatar = models.ImageField(
         upload_to=get_avatar_upload_path,
+        storage=get_media_storage,
         blank=True, null=True,
         validators=[validate_image_file_extension, validate_image_size],
     )
@@ -30,8 +30,22 @@ class CommentAdmin(admin.ModelAdmin):
     list_display_links = ('user',)
 
 
+@admin.register(models.MediaJob)
+class MediaJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'kind')
+
+
+class PlaylistTitleInline(admin.TabularInline):
+    model = models.PlaylistTitle
+    raw_id_fields = ('title',)
+    ordering = ('position', 'id')
+    extra = 0
+
+
 @admin.register(models.Playlist)
 class PlaylistAdmin(admin.ModelAdmin):
+    inlines = (PlaylistTitleInline,)
     list_display = ('id', 'user', 'name')
     list_display_links = ('user',)
     search_fields = ('user__email', 'user__username', 'title__name')
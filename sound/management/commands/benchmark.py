@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from sound.services.benchmark import compare, read_baseline, run_benchmark, write_baseline
+
+
+class Command(BaseCommand):
+    help = ('Замер задержек и числа SQL запросов GET маршрутов API на текущей базе '
+            '(см. seed_catalog) и сравнение с базовой линией.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json'))
+        parser.add_argument('--write-baseline', action='store_true', help='Записать замеры как новую базовую линию.')
+        parser.add_argument('--tolerance', type=float, default=0.5, help='Допустимый рост p50 и p95, доля от базовой линии.')
+        parser.add_argument('--slack-ms', type=float, default=5.0, help='Допустимый рост p50 и p95 сверх доли, мс.')
+        parser.add_argument('--warm', action='store_true', help='Не очищать кеш перед каждым запросом.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            results, skipped = run_benchmark(options['iterations'], not options['warm'], log=self.stdout.write)
+        finally:
+            teardown_test_environment()
+        for template in skipped:
+            self.stdout.write(f'{template}: пропущен')
+
+        if options['write_baseline']:
+            write_baseline(options['baseline'], results, options['iterations'], not options['warm'])
+            self.stdout.write(f'Базовая линия записана в {options["baseline"]}')
+            return
+        if not os.path.exists(options['baseline']):
+            raise CommandError(f'Базовая линия {options["baseline"]} не найдена, запишите её --write-baseline')
+        regressions = compare(results, read_baseline(options['baseline']), options['tolerance'], options['slack_ms'])
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from sound.services.similar import build_similar_titles, np
+
+
+class Command(BaseCommand):
+    help = 'Расчёт похожих аудиозаписей по совместным вхождениям в плейлисты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Пересчитать все аудиозаписи, а не только из изменившихся плейлистов.')
+
+    def handle(self, *args, **options):
+        if np is None:
+            self.stdout.write('NumPy и SciPy не установлены, расчёт идёт на чистом Python')
+        count = build_similar_titles(full=options['full'])
+        self.stdout.write(f'Пересчитано аудиозаписей: {count}')
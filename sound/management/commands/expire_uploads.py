@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sound.services.media import expire_uploads
+
+
+class Command(BaseCommand):
+    help = 'Отмена загрузок без новых частей дольше UPLOAD_TTL и удаление принятых частей файлов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl', type=int, default=settings.UPLOAD_TTL, help='Срок в секундах.')
+
+    def handle(self, *args, **options):
+        expired = expire_uploads(options['ttl'])
+        self.stdout.write(f'Отменено загрузок: {expired}')
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sound.models import ListenEvent
+
+
+class Command(BaseCommand):
+    help = 'Удаление событий прослушивания старше срока хранения, по дням.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.LISTEN_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        border = timezone.localdate() - timedelta(days=options['days'])
+        removed = 0
+        days = ListenEvent.objects.filter(day__lt=border).values_list('day', flat=True).distinct().order_by('day')
+        for day in list(days):
+            removed += ListenEvent.objects.filter(day=day).delete()[0]
+        self.stdout.write(f'Удалено событий: {removed}')
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sound.services.images import prune_thumbnails
+from sound.services.storage import get_media_storage
+
+
+class Command(BaseCommand):
+    help = 'Вытеснение из кеша на диске уменьшенных копий, к которым дольше всего не обращались (по atime).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-bytes', type=int, default=settings.THUMBNAIL_CACHE_MAX_BYTES)
+
+    def handle(self, *args, **options):
+        removed, total = prune_thumbnails(get_media_storage(), options['max_bytes'])
+        self.stdout.write(f'Удалено файлов: {removed}, размер кеша: {total} байт')
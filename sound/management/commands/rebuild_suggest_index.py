@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sound.services.suggest import write_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Построение снимка индекса подсказок, который загружают процессы веб-сервера.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=settings.SUGGEST_SNAPSHOT_PATH)
+
+    def handle(self, *args, **options):
+        count = write_snapshot(options['path'])
+        self.stdout.write(f'В снимок {options["path"]} записано объектов: {count}')
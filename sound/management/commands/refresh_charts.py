@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from sound.services.charts import refresh_charts
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт чартов по часовым счётчикам, запускается по расписанию раз в час.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Пересчитать счёт окон с нуля.')
+
+    def handle(self, *args, **options):
+        refresh_charts(full=options['full'])
+        self.stdout.write('Чарты обновлены')
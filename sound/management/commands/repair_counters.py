@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sound.services.counters import repair_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт денормализованных счётчиков пользователей, аудиозаписей и плейлистов.'
+
+    def handle(self, *args, **options):
+        for counter, repaired in repair_counters().items():
+            self.stdout.write(f'{counter}: исправлено строк {repaired}')
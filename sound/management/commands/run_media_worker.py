@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from sound.services import feed, media, search  # noqa: F401  регистрация обработчиков задач
+from sound.services.jobs import claim_job, run_job
+
+
+def work(poll_interval, once):
+    """Цикл одного процесса воркера: берёт задачи из очереди, пока не получит SIGTERM."""
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while not stopping:
+        close_old_connections()
+        job = claim_job()
+        if job is not None:
+            run_job(job)
+        elif once:
+            break
+        else:
+            time.sleep(poll_interval)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Запуск пула процессов, выполняющих фоновую обработку медиафайлов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.MEDIA_WORKER_PROCESSES)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help='Выполнить готовые задачи и выйти.')
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=work, args=(options['poll_interval'], options['once']))
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Запущено процессов: {len(workers)}')
+
+        def terminate(signum, frame):
+            for worker in workers:
+                worker.terminate()
+
+        signal.signal(signal.SIGTERM, terminate)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.join()
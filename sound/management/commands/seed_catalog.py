@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from sound.services.seed import Seeder
+
+
+class Command(BaseCommand):
+    help = ('Синтетический каталог для нагрузочных замеров: пользователи, альбомы, аудиозаписи, подписки, '
+            'плейлисты и комментарии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--albums', type=int, default=100_000)
+        parser.add_argument('--titles', type=int, default=1_000_000)
+        parser.add_argument('--follows', type=int, default=5_000_000)
+        parser.add_argument('--playlists', type=int, default=200_000)
+        parser.add_argument('--playlist-size', type=int, default=50, help='Предельная длина плейлиста.')
+        parser.add_argument('--comments', type=int, default=2_000_000)
+        parser.add_argument('--scale', type=float, default=1.0, help='Множитель всех объёмов, например 0.01.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help='Зерно генератора: одинаковое зерно — одинаковый каталог.')
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        seeder = Seeder(batch_size=options['batch_size'], seed=options['seed'], log=self.stdout.write)
+        seeder.seed(
+            users=max(2, int(options['users'] * scale)),
+            albums=int(options['albums'] * scale),
+            titles=max(1, int(options['titles'] * scale)),
+            follows=int(options['follows'] * scale),
+            playlists=int(options['playlists'] * scale),
+            playlist_size=options['playlist_size'],
+            comments=int(options['comments'] * scale),
+        )
@@ -0,0 +1,47 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from sound.services.cleanup import DELETE_BATCH_SIZE, sweep_orphan_media
+
+CHECKPOINT_NAME = '.sweep_orphan_media'
+
+
+class Command(BaseCommand):
+    help = 'Удаление файлов MEDIA_ROOT, на которые не ссылается ни одна запись в базе.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-files', type=int, default=None,
+                            help='Проверить не больше файлов и продолжить с этого места при следующем запуске.')
+        parser.add_argument('--min-age', type=int, default=86400,
+                            help='Не трогать файлы моложе стольких секунд.')
+        parser.add_argument('--batch-size', type=int, default=DELETE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        checkpoint = default_storage.path(CHECKPOINT_NAME)
+        try:
+            with open(checkpoint) as file:
+                start_after = file.read().strip()
+        except FileNotFoundError:
+            start_after = ''
+
+        checked, removed, freed, last = sweep_orphan_media(
+            default_storage,
+            start_after=start_after,
+            max_files=options['max_files'],
+            min_age=options['min_age'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        if not options['dry_run']:
+            if last is None:
+                if os.path.exists(checkpoint):
+                    os.remove(checkpoint)
+            else:
+                with open(checkpoint, 'w') as file:
+                    file.write(last)
+        self.stdout.write(f'Проверено файлов: {checked}, удалено: {removed}, освобождено: {freed} байт')
+        if last is not None:
+            self.stdout.write(f'Обход остановлен на {last}, следующий запуск продолжит с него')
@@ -0,0 +1,80 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .services.metrics import get_view_labels, record_request
+from .services.timing import RequestTimer, current_timer, log_slow_request
+
+UNRESOLVED_LABELS = ('unresolved', '')
+
+
+class MetricsMiddleware:
+    """Метрики Prometheus запроса: время, код, размер ответа и число SQL запросов по viewset и action."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        labels = getattr(request, '_metrics_labels', UNRESOLVED_LABELS)
+        record_request(labels, response, time.perf_counter() - started, queries[0])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_labels = get_view_labels(view_func, request.method)
+
+
+class RequestTimingMiddleware:
+    """Замер SQL, представления, сериализации и рендеринга запроса.
+
+    Итог отдаётся в заголовке Server-Timing, запросы дольше
+    REQUEST_TIMING_SLOW_MS пишутся в лог sound.timing с самыми долгими SQL.
+    При REQUEST_TIMING=0 middleware отключается при запуске и ничего не
+    стоит. Время представления — от process_view до process_template_response
+    (или до ответа, если рендеринга нет), дальше идёт рендеринг.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer.record_query))
+                response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        timer.finish()
+        response['Server-Timing'] = timer.get_header()
+        if timer.total * 1000 >= settings.REQUEST_TIMING_SLOW_MS:
+            log_slow_request(request, response, timer)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_timer.get().start('view')
+
+    def process_template_response(self, request, response):
+        timer = current_timer.get()
+        timer.stop('view')
+        timer.start('render')
+        return response
@@ -0,0 +1,40 @@
+# Generated by Django 4.1.1 on 2026-10-18 17:58
+
+import django.core.validators
+from django.db import migrations, models
+import sound.services.services
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sound', '0002_follow_subscription_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='cover',
+            field=models.ImageField(blank=True, null=True, upload_to=sound.services.services.get_title_cover_upload_path, validators=[django.core.validators.validate_image_file_extension, sound.services.services.validate_size_image]),
+        ),
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['user', '-id'], name='album_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['title', '-create_at', '-id'], name='comment_title_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['user', 'id'], name='follow_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playlist',
+            index=models.Index(fields=['user', '-id'], name='playlist_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['user', '-create_at', '-id'], name='title_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sound', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeekIndex',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='seek_index', serialize=False, to='sound.title')),
+                ('sample_rate', models.PositiveIntegerField()),
+                ('samples_per_frame', models.PositiveSmallIntegerField()),
+                ('duration', models.FloatField()),
+                ('offsets', models.BinaryField()),
+            ],
+            options={
+                'verbose_name': 'Таблица перемотки',
+                'verbose_name_plural': 'Таблицы перемотки',
+            },
+        ),
+    ]
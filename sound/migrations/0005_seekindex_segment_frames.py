@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sound', '0004_seekindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seekindex',
+            name='segment_frames',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:11
+
+from django.db import migrations, models
+
+POSTGRESQL_INDEXES = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    "CREATE INDEX title_search_document_idx ON sound_title "
+    "USING gin (to_tsvector('simple'::regconfig, COALESCE(search_document, '')))",
+    'CREATE INDEX title_search_trgm_idx ON sound_title USING gin (search_document gin_trgm_ops)',
+)
+SQLITE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE sound_title_fts USING fts5("
+    "document, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    Title = apps.get_model('sound', 'Title')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_FTS_TABLE)
+
+    titles = Title.objects.select_related('user', 'album').prefetch_related('genre')
+    for title in titles.iterator(chunk_size=500):
+        parts = [title.name, title.user.username]
+        if title.album_id:
+            parts.append(title.album.name)
+        parts.extend(genre.name for genre in title.genre.all())
+        title.search_document = ' '.join(parts)
+        title.save(update_fields=['search_document'])
+        if vendor == 'sqlite' and not title.private:
+            schema_editor.execute(
+                'INSERT INTO sound_title_fts (rowid, document) VALUES (%s, %s)',
+                [title.id, title.search_document],
+            )
+
+    if vendor == 'postgresql':
+        for sql in POSTGRESQL_INDEXES:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS sound_title_fts')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS title_search_document_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS title_search_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sound', '0008_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
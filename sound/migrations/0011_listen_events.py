@@ -0,0 +1,43 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sound', '0010_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='play_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ListenEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('create_at', models.DateTimeField()),
+                ('title', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='listen_events', to='sound.title')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Прослушивание',
+                'verbose_name_plural': 'Прослушивания',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='listenevent',
+            index=models.Index(fields=['day'], name='listenevent_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listenevent',
+            index=models.Index(fields=['title', 'day'], name='listenevent_title_day_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sound', '0011_listen_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChartWindow',
+            fields=[
+                ('window', models.CharField(max_length=8, primary_key=True, serialize=False)),
+                ('processed_until', models.DateTimeField(null=True)),
+            ],
+            options={
+                'verbose_name': 'Окно чарта',
+                'verbose_name_plural': 'Окна чартов',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=8)),
+                ('score', models.FloatField(default=0)),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sound.title')),
+            ],
+            options={
+                'verbose_name': 'Счёт в чарте',
+                'verbose_name_plural': 'Счета в чартах',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('listens', models.PositiveIntegerField(default=0)),
+                ('likes', models.PositiveIntegerField(default=0)),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sound.title')),
+            ],
+            options={
+                'verbose_name': 'Счётчик за час',
+                'verbose_name_plural': 'Счётчики за час',
+            },
+        ),
+        migrations.CreateModel(
+            name='ChartEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=8)),
+                ('position', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('genre', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sound.genre')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sound.title')),
+            ],
+            options={
+                'verbose_name': 'Позиция в чарте',
+                'verbose_name_plural': 'Позиции в чартах',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trendscore',
+            constraint=models.UniqueConstraint(fields=('window', 'title'), name='trendscore_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='trendbucket',
+            index=models.Index(fields=['hour'], name='trendbucket_hour_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendbucket',
+            constraint=models.UniqueConstraint(fields=('title', 'hour'), name='trendbucket_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='chartentry',
+            index=models.Index(fields=['window', 'genre', 'position'], name='chartentry_window_genre_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sound', '0012_charts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityDirty',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='sound.title')),
+            ],
+            options={
+                'verbose_name': 'Аудиозапись для пересчёта похожих',
+                'verbose_name_plural': 'Аудиозаписи для пересчёта похожих',
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarTitle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sound.title')),
+                ('title', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='similar_titles', to='sound.title')),
+            ],
+            options={
+                'verbose_name': 'Похожая аудиозапись',
+                'verbose_name_plural': 'Похожие аудиозаписи',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='similartitle',
+            index=models.Index(fields=['title', '-score'], name='similartitle_title_score_idx'),
+        ),
+    ]
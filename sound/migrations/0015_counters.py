@@ -0,0 +1,47 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:21
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count(queryset, field):
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('*'))
+    return Coalesce(Subquery(counts.values('count'), output_field=IntegerField()), Value(0))
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model('oauth', 'CustomUser')
+    Title = apps.get_model('sound', 'Title')
+    Comment = apps.get_model('sound', 'Comment')
+    Follow = apps.get_model('sound', 'Follow')
+    Playlist = apps.get_model('sound', 'Playlist')
+    User.objects.update(
+        followers_count=count(Follow.objects.all(), 'subscriber'),
+        following_count=count(Follow.objects.all(), 'user'),
+        titles_count=count(Title.objects.all(), 'user'),
+    )
+    Title.objects.update(comments_count=count(Comment.objects.all(), 'title'))
+    Playlist.objects.update(titles_count=count(Playlist.titles.through.objects.all(), 'playlist'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oauth', '0003_counters'),
+        ('sound', '0014_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='titles_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
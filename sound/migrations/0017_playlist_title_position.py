@@ -0,0 +1,60 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+POSITION_STEP = 1 << 16
+
+
+def fill_positions(apps, schema_editor):
+    """Существующие записи выстраиваются в порядке добавления."""
+    PlaylistTitle = apps.get_model('sound', 'PlaylistTitle')
+    PlaylistTitle.objects.update(position=models.F('id') * POSITION_STEP)
+
+
+class Migration(migrations.Migration):
+    """Явная промежуточная модель поверх существующей таблицы sound_playlist_titles.
+
+    Таблица и её ограничение уникальности уже созданы ManyToManyField,
+    поэтому модель регистрируется только в состоянии, а в базу
+    добавляются позиция и индекс.
+    """
+
+    dependencies = [
+        ('sound', '0016_comment_position'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PlaylistTitle',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('playlist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='sound.playlist')),
+                        ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='playlist_entries', to='sound.title')),
+                    ],
+                    options={
+                        'verbose_name': 'Аудиозапись плейлиста',
+                        'verbose_name_plural': 'Аудиозаписи плейлиста',
+                        'db_table': 'sound_playlist_titles',
+                        'unique_together': {('playlist', 'title')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='playlist',
+                    name='titles',
+                    field=models.ManyToManyField(related_name='title_playlists', through='sound.PlaylistTitle', to='sound.title'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='playlisttitle',
+            name='position',
+            field=models.BigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_positions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='playlisttitle',
+            index=models.Index(fields=['playlist', 'position'], name='playlisttitle_position_idx'),
+        ),
+    ]
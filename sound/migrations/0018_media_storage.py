@@ -0,0 +1,37 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:56
+
+import audio_validator.validator
+import django.core.validators
+from django.db import migrations, models
+import sound.services.services
+import sound.services.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sound', '0017_playlist_title_position'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='album',
+            name='cover',
+            field=models.ImageField(blank=True, null=True, storage=sound.services.storage.get_media_storage, upload_to=sound.services.services.get_album_cover_upload_path, validators=[django.core.validators.validate_image_file_extension, sound.services.services.validate_size_image]),
+        ),
+        migrations.AlterField(
+            model_name='playlist',
+            name='cover',
+            field=models.ImageField(blank=True, null=True, storage=sound.services.storage.get_media_storage, upload_to=sound.services.services.get_playlist_cover_upload_path, validators=[django.core.validators.validate_image_file_extension, sound.services.services.validate_size_image]),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='cover',
+            field=models.ImageField(blank=True, null=True, storage=sound.services.storage.get_media_storage, upload_to=sound.services.services.get_title_cover_upload_path, validators=[django.core.validators.validate_image_file_extension, sound.services.services.validate_size_image]),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='file',
+            field=models.FileField(storage=sound.services.storage.get_media_storage, upload_to=sound.services.services.get_title_upload_path, validators=[audio_validator.validator.AudioValidator('mp3')]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sound', '0018_media_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
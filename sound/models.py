@@ -1,7 +1,10 @@
+import uuid
+
 from audio_validator.validator import AudioValidator
 from django.contrib.auth import get_user_model
 from django.core.validators import validate_image_file_extension
 from django.db import models
+from django.utils import timezone
 
 from oauth.models import CustomUser
 from sound.services.services import (get_album_cover_upload_path,
@@ -9,13 +12,23 @@ from sound.services.services import (get_album_cover_upload_path,
                                      get_title_upload_path,
                                      get_title_cover_upload_path,
                                      validate_size_image)
+from sound.services.mp3 import SeekTable
+from sound.services.storage import get_media_storage
 
 User = get_user_model()
 
 
+class ProcessingStatus(models.TextChoices):
+    """ Состояние фоновой обработки загруженных файлов."""
+    PROCESSING = 'processing', 'Обрабатывается'
+    READY = 'ready', 'Готово'
+    FAILED = 'failed', 'Ошибка обработки'
+
+
 class Genre(models.Model):
     """ Модель жанров."""
     name = models.CharField(max_length=256, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Жанр'
@@ -33,13 +46,19 @@ class Album(models.Model):
     private = models.BooleanField(default=False)
     cover = models.ImageField(
         upload_to=get_album_cover_upload_path,
+        storage=get_media_storage,
         blank=True, null=True,
         validators=[validate_image_file_extension, validate_size_image],
     )
+    status = models.CharField(max_length=16, choices=ProcessingStatus.choices, default=ProcessingStatus.READY)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Альбом'
         verbose_name_plural = 'Альбомы'
+        indexes = [
+            models.Index(fields=['user', '-id'], name='album_user_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -53,34 +72,70 @@ class Title(models.Model):
     album = models.ForeignKey(Album, on_delete=models.SET_NULL, blank=True, null=True)
     file = models.FileField(
         upload_to=get_title_upload_path,
+        storage=get_media_storage,
         validators=[AudioValidator('mp3')],
     )
     create_at = models.DateTimeField(auto_now_add=True)
     private = models.BooleanField(default=False)
     cover = models.ImageField(
         upload_to=get_title_cover_upload_path,
+        storage=get_media_storage,
         blank=True, null=True,
         validators=[validate_image_file_extension, validate_size_image],
     )
+    status = models.CharField(max_length=16, choices=ProcessingStatus.choices, default=ProcessingStatus.READY)
+    search_document = models.TextField(blank=True, default='', editable=False)
+    fanned_out = models.BooleanField(default=False, editable=False)
+    play_count = models.PositiveBigIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Аудиозапись'
         verbose_name_plural = 'Аудиозаписи'
+        indexes = [
+            models.Index(fields=['user', '-create_at', '-id'], name='title_user_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user} - {self.name}'
 
 
+class SeekIndex(models.Model):
+    """ Таблица перемотки аудиозаписи по MP3 фреймам."""
+    title = models.OneToOneField(Title, on_delete=models.CASCADE, primary_key=True, related_name='seek_index')
+    sample_rate = models.PositiveIntegerField()
+    samples_per_frame = models.PositiveSmallIntegerField()
+    duration = models.FloatField()
+    offsets = models.BinaryField()
+    segment_frames = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Таблица перемотки'
+        verbose_name_plural = 'Таблицы перемотки'
+
+    def __str__(self):
+        return f'{self.title} ({self.duration:.1f} c)'
+
+    def get_seek_table(self):
+        return SeekTable.from_bytes(self.sample_rate, self.samples_per_frame, self.offsets)
+
+
 class Comment(models.Model):
     """ Модель комментариев."""
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='comments')
     title = models.ForeignKey(Title, on_delete=models.CASCADE, related_name='title_comments')
     text = models.TextField(max_length=1024)
+    position_ms = models.PositiveIntegerField(blank=True, null=True)
     create_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['title', '-create_at', '-id'], name='comment_title_created_idx'),
+            models.Index(fields=['title', 'position_ms', 'id'], name='comment_title_position_idx'),
+        ]
 
     def __str__(self):
         return f'Пользователь {self.user} оставил коментарий к {self.title}.'
@@ -90,21 +145,59 @@ class Playlist(models.Model):
     """ Модель плейлистов пользователя."""
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='playlists')
     name = models.CharField(max_length=256)
-    titles = models.ManyToManyField(Title, related_name='title_playlists')
+    titles = models.ManyToManyField(Title, through='PlaylistTitle', related_name='title_playlists')
     private = models.BooleanField(default=False)
     cover = models.ImageField(
         upload_to=get_playlist_cover_upload_path,
+        storage=get_media_storage,
         blank=True, null=True,
         validators=[validate_image_file_extension, validate_size_image],
     )
+    status = models.CharField(max_length=16, choices=ProcessingStatus.choices, default=ProcessingStatus.READY)
+    titles_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Плейлист'
         verbose_name_plural = 'Плейлисты'
+        indexes = [
+            models.Index(fields=['user', '-id'], name='playlist_user_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def ordered_titles(self):
+        """Аудиозаписи в порядке плейлиста; использует prefetch_related('entries__title')."""
+        return [entry.title for entry in self.entries.all()]
+
+
+class PlaylistTitle(models.Model):
+    """ Аудиозапись в плейлисте.
+
+    Позиции разрежены с шагом POSITION_STEP, поэтому перенос записи
+    меняет одну строку; когда между соседями не остаётся места,
+    плейлист перенумеровывается.
+    """
+    POSITION_STEP = 1 << 16
+
+    playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE, related_name='entries')
+    title = models.ForeignKey(Title, on_delete=models.CASCADE, related_name='playlist_entries')
+    position = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'sound_playlist_titles'
+        verbose_name = 'Аудиозапись плейлиста'
+        verbose_name_plural = 'Аудиозаписи плейлиста'
+        unique_together = ('playlist', 'title')
+        indexes = [
+            models.Index(fields=['playlist', 'position'], name='playlisttitle_position_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.playlist_id}: {self.title_id} @ {self.position}'
+
 
 class Follow(models.Model):
     """Модель подписок."""
@@ -120,6 +213,237 @@ class Follow(models.Model):
                 fields=['user', 'subscriber'], name='follow_unique'
             )
         ]
+        indexes = [
+            models.Index(fields=['user', 'id'], name='follow_user_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.subscriber} подписан на {self.user}'
+
+
+class ListenEvent(models.Model):
+    """ Прослушивание аудиозаписи; day — ключ секционирования по дням."""
+    user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name='+')
+    title = models.ForeignKey(Title, on_delete=models.CASCADE, related_name='listen_events', db_index=False)
+    day = models.DateField()
+    create_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Прослушивание'
+        verbose_name_plural = 'Прослушивания'
+        indexes = [
+            models.Index(fields=['day'], name='listenevent_day_idx'),
+            models.Index(fields=['title', 'day'], name='listenevent_title_day_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.title} ({self.create_at})'
+
+
+class TrendBucket(models.Model):
+    """ Часовой счётчик прослушиваний и добавлений в плейлисты аудиозаписи."""
+    title = models.ForeignKey(Title, on_delete=models.CASCADE, related_name='+')
+    hour = models.DateTimeField()
+    listens = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик за час'
+        verbose_name_plural = 'Счётчики за час'
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'hour'], name='trendbucket_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='trendbucket_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id} {self.hour}: {self.listens}/{self.likes}'
+
+
+class TrendScore(models.Model):
+    """ Затухающий счёт аудиозаписи в окне чарта."""
+    window = models.CharField(max_length=8)
+    title = models.ForeignKey(Title, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = 'Счёт в чарте'
+        verbose_name_plural = 'Счета в чартах'
+        constraints = [
+            models.UniqueConstraint(fields=['window', 'title'], name='trendscore_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.window} {self.title_id}: {self.score:.2f}'
+
+
+class ChartWindow(models.Model):
+    """ Час, до которого пересчитан счёт окна чарта."""
+    window = models.CharField(max_length=8, primary_key=True)
+    processed_until = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name = 'Окно чарта'
+        verbose_name_plural = 'Окна чартов'
+
+    def __str__(self):
+        return f'{self.window} ({self.processed_until})'
+
+
+class ChartEntry(models.Model):
+    """ Позиция в чарте окна: общем (genre пуст) или жанровом."""
+    window = models.CharField(max_length=8)
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, null=True, related_name='+')
+    position = models.PositiveIntegerField()
+    title = models.ForeignKey(Title, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name = 'Позиция в чарте'
+        verbose_name_plural = 'Позиции в чартах'
+        indexes = [
+            models.Index(fields=['window', 'genre', 'position'], name='chartentry_window_genre_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.window} {self.genre_id} #{self.position}: {self.title_id}'
+
+
+class SimilarTitle(models.Model):
+    """ Похожая аудиозапись по совместным вхождениям в плейлисты."""
+    title = models.ForeignKey(Title, on_delete=models.CASCADE, related_name='similar_titles', db_index=False)
+    similar = models.ForeignKey(Title, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name = 'Похожая аудиозапись'
+        verbose_name_plural = 'Похожие аудиозаписи'
+        indexes = [
+            models.Index(fields=['title', '-score'], name='similartitle_title_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id} ~ {self.similar_id}: {self.score:.3f}'
+
+
+class SimilarityDirty(models.Model):
+    """ Аудиозапись, плейлисты которой изменились после расчёта похожих."""
+    title = models.OneToOneField(Title, on_delete=models.CASCADE, primary_key=True, related_name='+')
+
+    class Meta:
+        verbose_name = 'Аудиозапись для пересчёта похожих'
+        verbose_name_plural = 'Аудиозаписи для пересчёта похожих'
+
+    def __str__(self):
+        return str(self.title_id)
+
+
+class FeedItem(models.Model):
+    """ Запись ленты: аудиозапись автора, на которого подписан владелец ленты."""
+    owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='feed_items')
+    title = models.ForeignKey(Title, on_delete=models.CASCADE, related_name='feed_items')
+    author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    create_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'title'], name='feeditem_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', '-create_at', '-id'], name='feeditem_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.owner}: {self.title}'
+
+
+class FeedState(models.Model):
+    """ Момент, до которого в ленту подтянуты записи авторов без рассылки."""
+    owner = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='feed_state')
+    pulled_at = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name = 'Состояние ленты'
+        verbose_name_plural = 'Состояния лент'
+
+    def __str__(self):
+        return f'{self.owner} ({self.pulled_at})'
+
+
+class Blob(models.Model):
+    """ Файл хранилища с адресацией по содержимому и число ссылок на него."""
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=256)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Файл хранилища'
+        verbose_name_plural = 'Файлы хранилища'
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount})'
+
+
+class Upload(models.Model):
+    """ Сессия докачиваемой загрузки аудиофайла.
+
+    Части файла дописываются сразу в итоговый файл file_name в хранилище.
+    Сессии без новых частей дольше UPLOAD_TTL отменяет команда expire_uploads.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='uploads')
+    name = models.CharField(max_length=256)
+    file_name = models.CharField(max_length=512)
+    length = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    create_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Загрузка'
+        verbose_name_plural = 'Загрузки'
+
+    def __str__(self):
+        return f'{self.user} - {self.name} ({self.offset}/{self.length})'
+
+    @property
+    def is_complete(self):
+        return self.offset == self.length
+
+
+class MediaJob(models.Model):
+    """ Задача фоновой обработки медиафайлов, выполняется командой run_media_worker."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='mediajob_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.id} ({self.status})'
@@ -1,6 +1,42 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
 
 
-class Pagination(PageNumberPagination):
+class Pagination(CursorPagination):
+    """Keyset-пагинация по непрозрачному курсору.
+
+    Порядок берётся из атрибута `ordering` представления, поэтому каждая
+    выборка листается по своему индексу без OFFSET и COUNT(*).
+    По запросу `?total=1` возвращается приблизительное количество записей,
+    посчитанное не дальше `total_limit`.
+    """
     page_size = 20
-    page_query_param = 'page_size'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+    total_query_param = 'total'
+    total_limit = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        if request.query_params.get(self.total_query_param) in ('1', 'true'):
+            self.total = queryset.order_by()[:self.total_limit + 1].count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.total is not None:
+            response.data['total'] = min(self.total, self.total_limit)
+            response.data['total_is_exact'] = self.total <= self.total_limit
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['total'] = {'type': 'integer', 'nullable': True}
+        response_schema['properties']['total_is_exact'] = {'type': 'boolean', 'nullable': True}
+        return response_schema
@@ -8,13 +8,13 @@ class IsAuthorOrAdminOrReadOnly(BasePermission):
         return True
 
     def has_object_permission(self, request, view, obj):
-        if request.method in SAFE_METHODS or request.user.is_superuser:
+        if request.method in SAFE_METHODS or request.user.is_staff:
             return True
         return request.user == obj.user
 
 
 class IsOwnerOrAdminOrReadOnly(IsAuthorOrAdminOrReadOnly):
     def has_object_permission(self, request, view, obj):
-        if request.method in SAFE_METHODS or request.user.is_superuser:
+        if request.method in SAFE_METHODS or request.user.is_staff:
             return True
         return request.user == obj
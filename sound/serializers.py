@@ -1,78 +1,219 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
 
 from . import models
-from .services.services import delete_old_file
+from .services.cleanup import delete_files_on_commit
+from .services.images import get_thumbnail_name
+from .services.media import get_upload_expiry, reserve_upload_file
+from .services.timing import TimedSerializerMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class ModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """ModelSerializer с замером сериализации для Server-Timing."""
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """Ссылки на уменьшенные копии изображения, format: {размер: {формат: url}}."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        srcset = {}
+        for size in settings.THUMBNAIL_SIZES:
+            srcset[size] = {}
+            for extension in ('webp', 'jpeg'):
+                url = value.storage.url(get_thumbnail_name(value.name, size, extension))
+                srcset[size][extension] = request.build_absolute_uri(url) if request is not None else url
+        return srcset
+
+
+class UserSerializer(ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_srcset = SrcsetField(source='avatar')
 
     class Meta:
         model = models.User
-        fields = ('id', 'email', 'username', 'country', 'city', 'bio', 'avatar', 'is_subscribed')
+        fields = ('id', 'email', 'username', 'country', 'city', 'bio', 'avatar', 'avatar_srcset',
+                  'is_subscribed', 'followers_count', 'following_count', 'titles_count')
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return models.Follow.objects.filter(user=request.user, subscriber=obj.id).exists()
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(ModelSerializer):
     class Meta:
         model = models.Genre
         fields = ('id', 'name')
 
 
-class AlbumSerializer(serializers.ModelSerializer):
+class AlbumSerializer(ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    cover_srcset = SrcsetField(source='cover')
 
     class Meta:
         model = models.Album
-        fields = ('id', 'name', 'description', 'cover', 'private', 'user')
+        fields = ('id', 'name', 'description', 'cover', 'cover_srcset', 'private', 'status', 'user')
+        read_only_fields = ('status',)
 
     def update(self, instance, validated_data):
-        delete_old_file(instance.cover.path)
+        if 'cover' in validated_data:
+            delete_files_on_commit(instance.cover.name)
         return super().update(instance, validated_data)
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
-    genres = GenreSerializer(many=True, read_only=True)
+    genres = GenreSerializer(source='genre', many=True, read_only=True)
+    cover_srcset = SrcsetField(source='cover')
 
     class Meta:
         model = models.Title
         fields = ('id', 'name', 'genres', 'album', 'file',
-                  'create_at', 'private', 'cover', 'user')
+                  'create_at', 'private', 'cover', 'cover_srcset', 'status', 'play_count',
+                  'comments_count', 'user')
+        read_only_fields = ('status', 'play_count', 'comments_count')
 
     def update(self, instance, validated_data):
-        delete_old_file(instance.file.path)
-        delete_old_file(instance.cover.path)
+        if 'file' in validated_data:
+            delete_files_on_commit(instance.file.name)
+        if 'cover' in validated_data:
+            delete_files_on_commit(instance.cover.name)
         return super().update(instance, validated_data)
 
 
-class PlaylistSerializer(serializers.ModelSerializer):
+class ChartEntrySerializer(ModelSerializer):
+    title = TitleSerializer(read_only=True)
+
+    class Meta:
+        model = models.ChartEntry
+        fields = ('position', 'score', 'title')
+
+
+class PlaylistSerializer(ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
-    titles = TitleSerializer(many=True)
+    titles = TitleSerializer(source='ordered_titles', many=True, read_only=True)
+    cover_srcset = SrcsetField(source='cover')
 
     class Meta:
         model = models.Playlist
-        fields = ('id', 'name', 'cover', 'titles', 'private', 'user')
+        fields = ('id', 'name', 'cover', 'cover_srcset', 'titles', 'titles_count', 'private', 'status', 'user')
+        read_only_fields = ('status', 'titles_count')
 
     def update(self, instance, validated_data):
-        delete_old_file(instance.cover.path)
+        if 'cover' in validated_data:
+            delete_files_on_commit(instance.cover.name)
         return super().update(instance, validated_data)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class PlaylistTitlesSerializer(serializers.Serializer):
+    """Аудиозаписи для массового изменения плейлиста и место вставки.
+
+    `after` — id аудиозаписи плейлиста, после которой встают записи;
+    null — в начало, без `after` — в конец.
+    """
+    titles = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1, max_length=settings.PLAYLIST_BATCH_SIZE
+    )
+    after = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+
+    def validate(self, data):
+        after = data.get('after')
+        if after is not None:
+            if after in data['titles']:
+                raise serializers.ValidationError({'after': 'Нельзя вставить записи после одной из них.'})
+            if not models.PlaylistTitle.objects.filter(playlist=self.context['playlist'], title_id=after).exists():
+                raise serializers.ValidationError({'after': 'Аудиозаписи нет в плейлисте.'})
+        return data
+
+
+class PlaylistAddTitlesSerializer(PlaylistTitlesSerializer):
+    def validate_titles(self, value):
+        """Добавлять можно свои и публичные обработанные аудиозаписи."""
+        user = self.context['request'].user
+        available = set(models.Title.objects.filter(id__in=value).filter(
+            Q(private=False, status=models.ProcessingStatus.READY) | Q(user=user)
+        ).values_list('id', flat=True))
+        missing = [title_id for title_id in value if title_id not in available]
+        if missing:
+            raise serializers.ValidationError(f'Аудиозаписи не найдены: {", ".join(map(str, missing))}.')
+        return value
+
+
+class UploadSerializer(ModelSerializer):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    filename = serializers.CharField(write_only=True, max_length=256)
+
+    class Meta:
+        model = models.Upload
+        fields = ('id', 'name', 'filename', 'length', 'offset', 'create_at', 'user')
+        read_only_fields = ('offset', 'create_at')
+
+    def validate_filename(self, value):
+        if not value.lower().endswith('.mp3'):
+            raise serializers.ValidationError('Допустимы только файлы mp3.')
+        return value
+
+    def validate_length(self, value):
+        if not 0 < value <= settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Максимальный размер файла {settings.UPLOAD_MAX_SIZE // (1024 * 1024)}MB'
+            )
+        return value
+
+    def validate(self, data):
+        open_uploads = data['user'].uploads.filter(updated_at__gte=get_upload_expiry())
+        if open_uploads.count() >= settings.UPLOAD_MAX_OPEN:
+            raise serializers.ValidationError(
+                f'Можно держать открытыми не больше {settings.UPLOAD_MAX_OPEN} загрузок.'
+            )
+        return data
+
+    def create(self, validated_data):
+        filename = validated_data.pop('filename')
+        validated_data['file_name'] = reserve_upload_file(
+            validated_data['user'], validated_data['name'], filename
+        )
+        return super().create(validated_data)
+
+
+class UploadFinishSerializer(ModelSerializer):
+    class Meta:
+        model = models.Title
+        fields = ('album', 'private')
+
+    def validate_album(self, value):
+        request = self.context.get('request')
+        if value is not None and value.user_id != request.user.id:
+            raise serializers.ValidationError('Можно выбрать только свой альбом.')
+        return value
+
+
+class CommentSerializer(ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
 
     class Meta:
         model = models.Comment
-        fields = ('id', 'text', 'user', 'title', 'create_at')
+        fields = ('id', 'text', 'position_ms', 'user', 'title', 'create_at')
 
+    def validate(self, data):
+        position_ms = data.get('position_ms')
+        title = data.get('title') or getattr(self.instance, 'title', None)
+        if position_ms is not None and title is not None:
+            duration = models.SeekIndex.objects.filter(title=title).values_list('duration', flat=True).first()
+            if duration is not None and position_ms > duration * 1000:
+                raise serializers.ValidationError({'position_ms': 'Позиция за пределами аудиозаписи.'})
+        return data
 
-class FollowerSerializer(serializers.ModelSerializer):
+
+class FollowerSerializer(ModelSerializer):
     id = serializers.ReadOnlyField(source='subscriber.id')
     username = serializers.ReadOnlyField(source='subscriber.username')
     is_subscribed = serializers.SerializerMethodField()
@@ -85,12 +226,14 @@ class FollowerSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return models.Follow.objects.filter(
             user=obj.user, subscriber=obj.subscriber
         ).exists()
 
 
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(ModelSerializer):
     queryset = models.User.objects.all()
     user = serializers.PrimaryKeyRelatedField(queryset=queryset)
     subscriber = serializers.PrimaryKeyRelatedField(queryset=queryset)
@@ -107,14 +250,21 @@ class FollowSerializer(serializers.ModelSerializer):
             subscriber__id=subscriber_id
         ).exists()
 
-        if request.method == 'GET':
-            if request.user.id == subscriber_id:
-                raise serializers.ValidationError(
-                    'Нельзя подписаться на себя.'
-                )
-            if follow_exists:
-                raise serializers.ValidationError(
-                    'Вы уже подписаны на этого пользователя.'
-                )
+        if request.user.id == subscriber_id:
+            raise serializers.ValidationError(
+                'Нельзя подписаться на себя.'
+            )
+        if follow_exists:
+            raise serializers.ValidationError(
+                'Вы уже подписаны на этого пользователя.'
+            )
 
         return data
+
+    def create(self, validated_data):
+        # Параллельная подписка проходит validate, но упирается в follow_unique.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError('Вы уже подписаны на этого пользователя.')
@@ -0,0 +1,165 @@
+import json
+import re
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from rest_framework.test import APIClient
+
+from sound import models
+
+ROUTE_MODULES = ('sound.urls', 'oauth.urls')
+GROUP_RE = re.compile(r'\(\?P<(\w+)>[^()]*\)')
+PERCENTILES = (50, 95, 99)
+
+
+def iter_routes(patterns=None, prefix='', module=None):
+    """(шаблон пути, маршрут) для маршрутов из ROUTE_MODULES, с полными путями от корня."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            urlconf = getattr(pattern.urlconf_name, '__name__', module)
+            yield from iter_routes(pattern.url_patterns, prefix + str(pattern.pattern), urlconf)
+        elif module in ROUTE_MODULES:
+            template = GROUP_RE.sub(r'{\1}', prefix + str(pattern.pattern)).replace('^', '').replace('$', '')
+            yield '/' + template, pattern
+
+
+def get_methods(callback):
+    if hasattr(callback, 'actions'):
+        return set(callback.actions)
+    view_class = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+    if view_class is None:
+        return {'get'}
+    return {method for method in view_class.http_method_names if hasattr(view_class, method)}
+
+
+def get_samples():
+    """Объекты для подстановки в маршруты: самые нагруженные, чтобы замеры шли по худшему случаю.
+
+    Возвращает зрителя и параметры маршрутов по basename роутера.
+    """
+    viewer = models.User.objects.order_by('-following_count', 'id').first()
+    owner = models.User.objects.exclude(id=viewer.id).order_by('-titles_count', 'id').first()
+    title = models.Title.objects.filter(private=False).order_by('-comments_count', 'id').first()
+    playlist = models.Playlist.objects.filter(private=False).order_by('-titles_count', 'id').first()
+    album = models.Album.objects.filter(private=False).order_by('-id').first()
+    genre = models.Genre.objects.order_by('id').first()
+    comment = title and models.Comment.objects.filter(title=title).order_by('-id').first()
+    samples = {
+        'users_api_v1': {'pk': owner.id},
+        'genres_api_v1': genre and {'pk': genre.id},
+        'titles_api_v1': title and {'user_id': title.user_id, 'pk': title.id},
+        'playlist_api_v1': playlist and {'user_id': playlist.user_id, 'pk': playlist.id},
+        'albums_api_v1': album and {'user_id': album.user_id, 'pk': album.id},
+        'comments_api_v1': comment and {'user_id': title.user_id, 'title_id': title.id, 'pk': comment.id},
+    }
+    query = title.name.split()[0] if title else 'a'
+    params = {
+        'search_api_v1-list': {'q': query},
+        'suggest_api_v1-list': {'q': query[:3]},
+    }
+    return viewer, samples, params
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(rank / 100 * len(ordered)) - 1))]
+
+
+def measure(client, path, params, iterations, cold):
+    """Задержки в миллисекундах, число SQL запросов последнего прохода и код ответа."""
+    timings = []
+    for _ in range(iterations + 1):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(path, params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            response.close()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings[1:], len(queries), response.status_code
+
+
+def run_benchmark(iterations=50, cold=True, log=print):
+    """Замер GET всех маршрутов ROUTE_MODULES через тестовый клиент от имени одного зрителя.
+
+    Маршруты без GET и без объектов для подстановки пропускаются и
+    попадают в skipped. Первый запрос к маршруту прогревочный и не
+    учитывается.
+    """
+    viewer, samples, route_params = get_samples()
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(viewer)
+    results, skipped = {}, []
+    for template, route in iter_routes():
+        groups = route.pattern.regex.groupindex
+        if 'format' in groups:
+            continue
+        if 'get' not in get_methods(route.callback):
+            skipped.append(template)
+            continue
+        basename = (route.name or '').split('-', 1)[0]
+        kwargs = samples.get(basename) or {}
+        if any(group not in kwargs for group in groups):
+            skipped.append(template)
+            continue
+        path = template.format(**{group: kwargs[group] for group in groups})
+        timings, queries, status = measure(client, path, route_params.get(route.name, {}), iterations, cold)
+        results[template] = {
+            'status': status,
+            'queries': queries,
+            **{f'p{rank}': round(percentile(timings, rank), 2) for rank in PERCENTILES},
+        }
+        log(f'{template}: {status}, запросов {queries}, p50 {results[template]["p50"]} мс, '
+            f'p95 {results[template]["p95"]} мс')
+    return results, skipped
+
+
+def get_catalog_size():
+    return {
+        'users': models.User.objects.count(),
+        'titles': models.Title.objects.count(),
+        'follows': models.Follow.objects.count(),
+        'playlists': models.Playlist.objects.count(),
+        'comments': models.Comment.objects.count(),
+    }
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Регрессии относительно базовой линии: другой код ответа, больше запросов, медленнее p50 или p95."""
+    regressions = []
+    for template, expected in baseline['routes'].items():
+        actual = results.get(template)
+        if actual is None:
+            regressions.append(f'{template}: маршрут не замерен')
+            continue
+        if actual['status'] != expected['status']:
+            regressions.append(f'{template}: код ответа {actual["status"]} вместо {expected["status"]}')
+        if actual['queries'] > expected['queries']:
+            regressions.append(f'{template}: запросов {actual["queries"]} вместо {expected["queries"]}')
+        for rank in ('p50', 'p95'):
+            budget = expected[rank] * (1 + tolerance) + slack_ms
+            if actual[rank] > budget:
+                regressions.append(f'{template}: {rank} {actual[rank]} мс при бюджете {budget:.2f} мс')
+    return regressions
+
+
+def read_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def write_baseline(path, results, iterations, cold):
+    baseline = {
+        'catalog': get_catalog_size(),
+        'iterations': iterations,
+        'cold_cache': cold,
+        'routes': results,
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(baseline, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write('\n')
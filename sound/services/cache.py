@@ -0,0 +1,89 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from sound import models
+
+CATALOG_SCOPE = 'catalog'
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 0.05
+
+
+def get_owner_scope(user_id):
+    return f'owner:{user_id}'
+
+
+def _version_key(scope):
+    return f'version:{scope}'
+
+
+def _new_version():
+    """Версия от времени: после вытеснения счётчика из кеша старые ключи не совпадут с новыми."""
+    return time.time_ns() // 1000
+
+
+def get_versions(scopes):
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    """Смена версий областей после фиксации транзакции: закешированные ответы перестают находиться."""
+    def bump():
+        for scope in scopes:
+            try:
+                cache.incr(_version_key(scope))
+            except ValueError:
+                cache.add(_version_key(scope), _new_version(), timeout=None)
+    transaction.on_commit(bump)
+
+
+def get_response_key(route, versions, visibility, full_path):
+    digest = hashlib.md5(full_path.encode()).hexdigest()
+    return f'response:{route}:{":".join(map(str, versions))}:{visibility}:{digest}'
+
+
+def make_etag(parts):
+    return '"{}"'.format(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def get_or_compute(key, compute, timeout):
+    """Значение из кеша; при промахе его вычисляет один процесс, остальные ждут результат.
+
+    Блокировка — cache.add; в файловом кеше он не строго атомарен, и в
+    редких случаях значение посчитают два процесса. Если результат не
+    появился за LOCK_TIMEOUT, ожидающий вычисляет его сам.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    lock_key = f'lock:{key}'
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        time.sleep(LOCK_WAIT)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if time.monotonic() > deadline:
+            break
+    try:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, timeout)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def get_title_scopes(title_ids):
+    """Области аудиозаписей: их авторы и владельцы плейлистов, в которые они входят целиком."""
+    owners = set(models.Title.objects.filter(id__in=title_ids).values_list('user_id', flat=True))
+    owners.update(models.Playlist.objects.filter(titles__in=title_ids).values_list('user_id', flat=True))
+    return [get_owner_scope(user_id) for user_id in owners]
@@ -0,0 +1,124 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from sound import models
+
+# Окна чартов в часах; счёт затухает экспоненциально с постоянной в четверть окна.
+WINDOWS = {
+    '24h': 24,
+    '7d': 7 * 24,
+    '30d': 30 * 24,
+}
+UPDATE_BATCH_SIZE = 500
+MIN_SCORE = 1e-3
+
+
+def get_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def add_to_buckets(counts, field, moment=None):
+    """Прибавление counts {аудиозапись: число} к часовым счётчикам field ('listens' или 'likes')."""
+    if not counts:
+        return
+    hour = get_hour(moment or timezone.now())
+    models.TrendBucket.objects.bulk_create(
+        [models.TrendBucket(title_id=title_id, hour=hour) for title_id in counts],
+        ignore_conflicts=True,
+    )
+    increment = Case(
+        *(When(title_id=title_id, then=Value(count)) for title_id, count in counts.items()),
+        default=Value(0),
+    )
+    models.TrendBucket.objects.filter(hour=hour, title_id__in=counts).update(**{field: F(field) + increment})
+
+
+def get_bucket_scores(start, end, now, tau):
+    """Затухший к моменту now вклад счётчиков за часы [start, end) по аудиозаписям."""
+    scores = defaultdict(float)
+    buckets = models.TrendBucket.objects.filter(hour__gte=start, hour__lt=end)
+    for title_id, hour, listens, likes in buckets.values_list('title_id', 'hour', 'listens', 'likes').iterator():
+        weight = listens + settings.CHART_LIKE_WEIGHT * likes
+        scores[title_id] += weight * math.exp(-(now - hour).total_seconds() / 3600 / tau)
+    return scores
+
+
+def apply_score_changes(window, changes):
+    """Прибавление изменений счёта к TrendScore пачками: одна вставка и один UPDATE на пачку."""
+    items = list(changes.items())
+    for start in range(0, len(items), UPDATE_BATCH_SIZE):
+        batch = dict(items[start:start + UPDATE_BATCH_SIZE])
+        models.TrendScore.objects.bulk_create(
+            [models.TrendScore(window=window, title_id=title_id) for title_id in batch],
+            ignore_conflicts=True,
+        )
+        delta = Case(
+            *(When(title_id=title_id, then=Value(change)) for title_id, change in batch.items()),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        models.TrendScore.objects.filter(window=window, title_id__in=batch).update(score=F('score') + delta)
+
+
+def refresh_window_scores(window, now):
+    """Инкрементальный пересчёт затухающего счёта окна до часа now.
+
+    Накопленный счёт умножается на затухание за прошедшее время, к нему
+    прибавляются новые часовые счётчики и вычитаются вышедшие из окна,
+    поэтому читаются только счётчики на двух краях окна.
+    """
+    hours = WINDOWS[window]
+    tau = hours / 4
+    state, _ = models.ChartWindow.objects.get_or_create(window=window)
+    last = state.processed_until
+    if last is None or now - last >= timedelta(hours=hours):
+        models.TrendScore.objects.filter(window=window).delete()
+        last = now - timedelta(hours=hours)
+        expired = {}
+    else:
+        elapsed = (now - last).total_seconds() / 3600
+        models.TrendScore.objects.filter(window=window).update(score=F('score') * math.exp(-elapsed / tau))
+        expired = get_bucket_scores(last - timedelta(hours=hours), now - timedelta(hours=hours), now, tau)
+    changes = get_bucket_scores(last, now, now, tau)
+    for title_id, score in expired.items():
+        changes[title_id] = changes.get(title_id, 0.0) - score
+    apply_score_changes(window, changes)
+    models.TrendScore.objects.filter(window=window, score__lt=MIN_SCORE).delete()
+    state.processed_until = now
+    state.save(update_fields=['processed_until'])
+
+
+def rebuild_chart_entries(window):
+    """Перезапись позиций чартов окна: общий и по каждому жанру."""
+    scores = models.TrendScore.objects.filter(
+        window=window, title__private=False, title__status=models.ProcessingStatus.READY
+    ).order_by('-score', 'title_id')
+    entries = []
+    for genre_id in [None, *models.Genre.objects.values_list('id', flat=True)]:
+        queryset = scores if genre_id is None else scores.filter(title__genre=genre_id)
+        rows = queryset.values_list('title_id', 'score')[:settings.CHART_SIZE]
+        entries.extend(
+            models.ChartEntry(window=window, genre_id=genre_id, position=position, title_id=title_id, score=score)
+            for position, (title_id, score) in enumerate(rows, start=1)
+        )
+    with transaction.atomic():
+        models.ChartEntry.objects.filter(window=window).delete()
+        models.ChartEntry.objects.bulk_create(entries, batch_size=UPDATE_BATCH_SIZE)
+    return len(entries)
+
+
+def refresh_charts(full=False):
+    """Пересчёт всех окон по завершённым часам и удаление счётчиков старше самого длинного окна."""
+    now = get_hour(timezone.now())
+    if full:
+        models.ChartWindow.objects.all().delete()
+    for window in WINDOWS:
+        refresh_window_scores(window, now)
+        rebuild_chart_entries(window)
+    models.TrendBucket.objects.filter(hour__lt=now - timedelta(hours=max(WINDOWS.values()) + 1)).delete()
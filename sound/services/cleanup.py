@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+
+from django.apps import apps
+from django.db import transaction
+
+from sound.services.images import THUMBNAIL_ROOT, delete_thumbnails
+from sound.services.jobs import enqueue, register
+from sound.services.services import delete_old_directory, get_title_segments_path
+from sound.services.storage import get_media_storage
+
+DELETE_BATCH_SIZE = 500
+SEGMENTS_DIRECTORY = 'segments'
+
+# Поля, имена файлов в которых считаются живыми ссылками на медиафайлы.
+MEDIA_REFERENCES = (
+    ('sound', 'Title', 'file'),
+    ('sound', 'Title', 'cover'),
+    ('sound', 'Album', 'cover'),
+    ('sound', 'Playlist', 'cover'),
+    ('oauth', 'CustomUser', 'avatar'),
+    ('sound', 'Upload', 'file_name'),
+    ('sound', 'Blob', 'name'),
+)
+
+_batch = threading.local()
+
+
+def delete_files_on_commit(*names):
+    """Удаление файлов после фиксации транзакции; при её откате файлы остаются на месте."""
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: _add_to_batch(names))
+
+
+def _add_to_batch(names):
+    pending = getattr(_batch, 'names', None)
+    if pending is None:
+        enqueue_deletion(names)
+    else:
+        pending.extend(names)
+
+
+def start_deletion_batch():
+    """Начало запроса: удаления копятся и ставятся в очередь одной задачей в его конце."""
+    _batch.names = []
+
+
+def flush_deletion_batch():
+    names = getattr(_batch, 'names', None)
+    _batch.names = None
+    if names:
+        enqueue_deletion(names)
+
+
+def enqueue_deletion(names):
+    names = list(dict.fromkeys(names))
+    for start in range(0, len(names), DELETE_BATCH_SIZE):
+        enqueue('delete_files', names=names[start:start + DELETE_BATCH_SIZE])
+
+
+def delete_media_file(storage, name):
+    """Удаление файла; производные сегменты и копии удаляются, если файла больше нет."""
+    storage.delete(name)
+    if not storage.exists(name):
+        delete_old_directory(storage.path(get_title_segments_path(name)))
+        delete_thumbnails(storage, name)
+
+
+@register('delete_files')
+def delete_media_files(names):
+    storage = get_media_storage()
+    for name in names:
+        delete_media_file(storage, name)
+
+
+def get_owner_names(name):
+    """Имена, ссылка на любое из которых сохраняет файл: сам файл и оригинал копии или сегмента."""
+    if name.startswith(THUMBNAIL_ROOT):
+        return name, os.path.dirname(name[len(THUMBNAIL_ROOT):])
+    parts = name.split('/')
+    if len(parts) >= 3 and parts[-3] == SEGMENTS_DIRECTORY:
+        return name, '/'.join(parts[:-3] + [parts[-2] + '.mp3'])
+    return name,
+
+
+def get_referenced_names(names):
+    """Какие из имён файлов упоминаются в базе, по запросу на поле за пачку имён."""
+    referenced = set()
+    for app_label, model_name, field in MEDIA_REFERENCES:
+        model = apps.get_model(app_label, model_name)
+        referenced.update(model.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True))
+    return referenced
+
+
+def get_entry_key(entry):
+    """Каталоги сравниваются с косой чертой, как имена файлов внутри них."""
+    return entry.name + '/' if entry.is_dir(follow_symlinks=False) else entry.name
+
+
+def walk_media(root, start_after=''):
+    """Обход файлов MEDIA_ROOT в порядке имён, начиная после start_after.
+
+    Каталоги читаются по одному через scandir, поэтому обход можно
+    прервать и продолжить со следующего имени без полного списка файлов.
+    """
+    def walk(directory, prefix):
+        try:
+            entries = sorted(os.scandir(directory), key=get_entry_key)
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            name = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if not start_after or start_after.startswith(name + '/') or name > start_after:
+                    yield from walk(entry.path, name + '/')
+            elif entry.is_file(follow_symlinks=False) and name > start_after and not entry.name.startswith('.'):
+                yield name, entry
+
+    return walk(root, '')
+
+
+def sweep_orphan_media(storage, start_after='', max_files=None, min_age=86400, batch_size=DELETE_BATCH_SIZE,
+                       dry_run=False):
+    """Удаление файлов MEDIA_ROOT, на которые не ссылается ни одна запись.
+
+    Файлы моложе min_age секунд пропускаются: их запись может быть ещё не
+    зафиксирована. Возвращает (проверено, удалено, освобождено байт,
+    последнее проверенное имя или None, если обход завершён).
+    """
+    checked = removed = freed = 0
+    deadline = time.time() - min_age
+    batch = []
+
+    def sweep_batch():
+        nonlocal removed, freed
+        referenced = get_referenced_names([owner for name, owners, size in batch for owner in owners])
+        for name, owners, size in batch:
+            if not referenced.isdisjoint(owners):
+                continue
+            if not dry_run:
+                try:
+                    os.remove(storage.path(name))
+                except FileNotFoundError:
+                    continue
+                remove_empty_directories(storage, name)
+            removed += 1
+            freed += size
+        batch.clear()
+
+    last = None
+    for name, entry in walk_media(storage.path(''), start_after):
+        if max_files is not None and checked >= max_files:
+            break
+        checked += 1
+        last = name
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        if stat.st_mtime > deadline:
+            continue
+        batch.append((name, get_owner_names(name), stat.st_size))
+        if len(batch) >= batch_size:
+            sweep_batch()
+    else:
+        last = None
+    if batch:
+        sweep_batch()
+    return checked, removed, freed, last
+
+
+def remove_empty_directories(storage, name):
+    directory = os.path.dirname(name)
+    while directory:
+        try:
+            os.rmdir(storage.path(directory))
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
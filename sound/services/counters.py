@@ -0,0 +1,68 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from sound import models
+from sound.services.cache import bump_versions, get_owner_scope, get_title_scopes
+
+
+def increment(model, object_ids, field, delta):
+    """Атомарное изменение счётчика через F(), без чтения строки; ниже нуля счётчик не уходит."""
+    queryset = model.objects.filter(id__in=object_ids)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta}, updated_at=timezone.now())
+    bump_counter_versions(model, object_ids)
+
+
+def bump_counter_versions(model, object_ids):
+    """UPDATE не вызывает post_save, поэтому закешированные ответы со счётчиками сбрасываются здесь.
+
+    Ответы пользователей не кешируются, им хватает нового updated_at.
+    """
+    if model is models.Title:
+        bump_versions(*get_title_scopes(object_ids))
+    elif model is models.Playlist:
+        owners = set(models.Playlist.objects.filter(id__in=object_ids).values_list('user_id', flat=True))
+        bump_versions(*map(get_owner_scope, owners))
+
+
+def get_count_subquery(queryset, field):
+    """Подзапрос числа строк queryset, у которых field совпадает с id внешней строки."""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('*'))
+    return Coalesce(Subquery(counts.values('count'), output_field=IntegerField()), Value(0))
+
+
+def get_counters():
+    """Счётчики: (модель, поле, подзапрос точного значения)."""
+    through = models.Playlist.titles.through
+    return (
+        (models.User, 'followers_count', get_count_subquery(models.Follow.objects.all(), 'subscriber')),
+        (models.User, 'following_count', get_count_subquery(models.Follow.objects.all(), 'user')),
+        (models.User, 'titles_count', get_count_subquery(models.Title.objects.all(), 'user')),
+        (models.Title, 'comments_count', get_count_subquery(models.Comment.objects.all(), 'title')),
+        (models.Playlist, 'titles_count', get_count_subquery(through.objects.all(), 'playlist')),
+    )
+
+
+def recount_playlist_titles(playlist_ids):
+    through = models.Playlist.titles.through
+    models.Playlist.objects.filter(id__in=playlist_ids).update(
+        titles_count=get_count_subquery(through.objects.all(), 'playlist'),
+        updated_at=timezone.now(),
+    )
+    bump_counter_versions(models.Playlist, playlist_ids)
+
+
+def repair_counters():
+    """Пересчёт разошедшихся счётчиков одним UPDATE на счётчик, возвращает {счётчик: исправлено строк}."""
+    repaired = {}
+    for model, field, actual in get_counters():
+        drifted = list(model.objects.annotate(actual=actual).exclude(**{field: F('actual')}).values_list(
+            'pk', flat=True
+        ))
+        repaired[f'{model._meta.label}.{field}'] = model.objects.filter(pk__in=drifted).update(
+            **{field: actual}, updated_at=timezone.now()
+        )
+        bump_counter_versions(model, drifted)
+    return repaired
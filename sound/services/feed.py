@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from sound import models
+from sound.services.jobs import register
+
+FEED_PULL_LIMIT = 500
+FEED_PULL_OVERLAP = timedelta(minutes=1)
+
+
+def add_feed_items(rows):
+    """Запись в ленты пачками по FEED_FANOUT_BATCH_SIZE, rows — (владелец, аудиозапись, автор, дата)."""
+    batch = []
+    for owner_id, title_id, author_id, create_at in rows:
+        batch.append(models.FeedItem(owner_id=owner_id, title_id=title_id, author_id=author_id, create_at=create_at))
+        if len(batch) >= settings.FEED_FANOUT_BATCH_SIZE:
+            models.FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        models.FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+@register('fan_out_title')
+def fan_out_title(title_id):
+    """Рассылка публичной обработанной аудиозаписи в ленты подписчиков автора.
+
+    Записи авторов, у которых подписчиков больше FEED_FANOUT_MAX_FOLLOWERS,
+    не рассылаются: их подтягивает pull_feed при чтении ленты.
+    """
+    title = models.Title.objects.filter(id=title_id, private=False, status=models.ProcessingStatus.READY).first()
+    if title is None:
+        return
+    followers = models.Follow.objects.filter(subscriber_id=title.user_id)
+    if followers[:settings.FEED_FANOUT_MAX_FOLLOWERS + 1].count() > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        return
+    owners = followers.values_list('user_id', flat=True).iterator(chunk_size=settings.FEED_FANOUT_BATCH_SIZE)
+    add_feed_items((owner_id, title.id, title.user_id, title.create_at) for owner_id in owners)
+    published = models.Title.objects.filter(id=title.id, private=False, status=models.ProcessingStatus.READY)
+    if not published.update(fanned_out=True):
+        remove_title_from_feeds(title.id)
+
+
+def remove_title_from_feeds(title_id):
+    models.FeedItem.objects.filter(title_id=title_id).delete()
+    models.Title.objects.filter(id=title_id).update(fanned_out=False)
+
+
+@register('backfill_feed')
+def backfill_feed(owner_id, author_id):
+    """Последние записи автора в ленту нового подписчика."""
+    titles = models.Title.objects.filter(
+        user_id=author_id, private=False, status=models.ProcessingStatus.READY
+    ).order_by('-create_at', '-id')
+    rows = titles.values_list('id', 'create_at')[:settings.FEED_BACKFILL_SIZE]
+    add_feed_items((owner_id, title_id, author_id, create_at) for title_id, create_at in rows)
+
+
+def remove_author_from_feed(owner_id, author_id):
+    models.FeedItem.objects.filter(owner_id=owner_id, author_id=author_id).delete()
+
+
+def pull_feed(owner):
+    """Подтягивание в ленту публичных записей подписок, которые не были разосланы.
+
+    Выполняется не чаще раза в FEED_PULL_INTERVAL секунд и смотрит только
+    записи, изменённые после прошлого раза: запись становится READY позже создания.
+    В остальное время это одно чтение FeedState по ключу.
+    """
+    now = timezone.now()
+    pulled_at = models.FeedState.objects.filter(owner=owner).values_list('pulled_at', flat=True).first()
+    if pulled_at is not None and now - pulled_at < timedelta(seconds=settings.FEED_PULL_INTERVAL):
+        return
+    titles = models.Title.objects.filter(
+        user__in=models.Follow.objects.filter(user=owner).values('subscriber'),
+        private=False,
+        status=models.ProcessingStatus.READY,
+        fanned_out=False,
+    )
+    if pulled_at is not None:
+        titles = titles.filter(updated_at__gte=pulled_at - FEED_PULL_OVERLAP)
+    rows = titles.order_by('-create_at').values_list('id', 'user_id', 'create_at')[:FEED_PULL_LIMIT]
+    add_feed_items((owner.id, title_id, author_id, create_at) for title_id, author_id, create_at in rows)
+    models.FeedState.objects.update_or_create(owner=owner, defaults={'pulled_at': now})
@@ -0,0 +1,120 @@
+import os
+import tempfile
+
+from django.conf import settings
+from PIL import Image
+
+THUMBNAIL_ROOT = 'thumbs/'
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def get_thumbnail_name(name, size, extension):
+    """Построение пути к уменьшенной копии, format: (media)/thumbs/{original}/{size}.{ext}"""
+    return f'{THUMBNAIL_ROOT}{name}/{size}.{extension}'
+
+
+def parse_thumbnail_name(thumbnail_name):
+    """Разбор пути уменьшенной копии на (оригинал, размер, формат), None если путь чужой."""
+    original, _, filename = thumbnail_name.rpartition('/')
+    size, _, extension = filename.partition('.')
+    if not original or not size.isdigit() or int(size) not in settings.THUMBNAIL_SIZES:
+        return None
+    if extension not in THUMBNAIL_FORMATS:
+        return None
+    return original, int(size), extension
+
+
+def _save_atomic(image, path, extension):
+    image_format, options = THUMBNAIL_FORMATS[extension]
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as temporary:
+        image.save(temporary, image_format, **options)
+    os.replace(temporary.name, path)
+
+
+def generate_thumbnails(storage, name):
+    """Построение всех уменьшенных копий изображения за одно его чтение."""
+    with Image.open(storage.path(name)) as original:
+        original.load()
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+        for size in settings.THUMBNAIL_SIZES:
+            image = original.copy()
+            image.thumbnail((size, size), Image.LANCZOS)
+            directory = os.path.dirname(storage.path(get_thumbnail_name(name, size, 'webp')))
+            os.makedirs(directory, exist_ok=True)
+            _save_atomic(image, storage.path(get_thumbnail_name(name, size, 'webp')), 'webp')
+            _save_atomic(image.convert('RGB'), storage.path(get_thumbnail_name(name, size, 'jpeg')), 'jpeg')
+
+
+def get_thumbnail(storage, name, size, extension):
+    """Путь к уменьшенной копии; при первом запросе копии строятся из оригинала."""
+    path = storage.path(get_thumbnail_name(name, size, extension))
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        generate_thumbnails(storage, name)
+    return path
+
+
+def delete_thumbnails(storage, name):
+    """Удаление уменьшенных копий изображения."""
+    for size in settings.THUMBNAIL_SIZES:
+        for extension in THUMBNAIL_FORMATS:
+            storage.delete(get_thumbnail_name(name, size, extension))
+
+
+def is_atime_tracked(path):
+    """Обновляет ли файловая система время доступа к файлам в path (нет noatime в опциях монтирования)."""
+    try:
+        with open('/proc/self/mounts') as mounts:
+            entries = [line.split() for line in mounts]
+    except OSError:
+        return True
+    path = os.path.realpath(path)
+    mounted = [
+        (mount_point, options) for _, mount_point, _, options, *_ in entries
+        if path == mount_point or path.startswith(mount_point.rstrip('/') + '/')
+    ]
+    if not mounted:
+        return True
+    _, options = max(mounted, key=lambda entry: len(entry[0]))
+    return 'noatime' not in options.split(',')
+
+
+def prune_thumbnails(storage, max_bytes):
+    """Вытеснение копий, к которым дольше всего не обращались, пока кеш больше max_bytes.
+
+    Готовые копии nginx отдаёт с диска сам, поэтому время обращения — atime
+    (при relatime он обновляется раз в сутки, этого для вытеснения достаточно).
+    На разделе с noatime остаётся только время построения или запроса через приложение.
+    Возвращает (число удалённых файлов, итоговый размер кеша).
+    """
+    root_path = storage.path(THUMBNAIL_ROOT)
+    atime_tracked = os.path.isdir(root_path) and is_atime_tracked(root_path)
+    entries = []
+    total = 0
+    for root, directories, files in os.walk(root_path):
+        for filename in files:
+            path = os.path.join(root, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            used_at = max(stat.st_atime, stat.st_mtime) if atime_tracked else stat.st_mtime
+            entries.append((used_at, stat.st_size, path))
+            total += stat.st_size
+    removed = 0
+    entries.sort()
+    for used_at, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed, total
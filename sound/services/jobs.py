@@ -0,0 +1,114 @@
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from sound import models
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+class PermanentJobError(Exception):
+    """Ошибка, после которой повторять задачу бессмысленно."""
+
+
+def register(kind, on_failure=None):
+    """Регистрация обработчика задач вида kind.
+
+    on_failure вызывается с теми же аргументами, когда попытки исчерпаны.
+    """
+    def decorator(func):
+        handlers[kind] = (func, on_failure)
+        return func
+    return decorator
+
+
+def enqueue(kind, **payload):
+    """Постановка задачи в очередь, видна воркерам после фиксации транзакции."""
+    return models.MediaJob.objects.create(
+        kind=kind,
+        payload=payload,
+        max_attempts=settings.MEDIA_JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim_job():
+    """Захват одной готовой задачи; зависшие дольше MEDIA_JOB_TIMEOUT задачи берутся повторно."""
+    now = timezone.now()
+    ready = Q(status=models.MediaJob.PENDING, run_after__lte=now)
+    stale = Q(status=models.MediaJob.RUNNING, updated_at__lt=now - timedelta(seconds=settings.MEDIA_JOB_TIMEOUT))
+    candidates = models.MediaJob.objects.filter(ready | stale).order_by('run_after', 'id')
+    for job in candidates.only('id', 'status', 'updated_at')[:10]:
+        claimed = models.MediaJob.objects.filter(
+            id=job.id, status=job.status, updated_at=job.updated_at
+        ).update(status=models.MediaJob.RUNNING, attempts=F('attempts') + 1, updated_at=now)
+        if claimed:
+            return models.MediaJob.objects.get(id=job.id)
+    return None
+
+
+def claimed_by(job):
+    """Задача, пока она принадлежит именно этому захвату."""
+    return models.MediaJob.objects.filter(id=job.id, status=models.MediaJob.RUNNING, attempts=job.attempts)
+
+
+@contextmanager
+def heartbeat(job):
+    """Продление захвата, пока выполняется обработчик.
+
+    Без этого задача дольше MEDIA_JOB_TIMEOUT считается зависшей и её берёт другой воркер.
+    """
+    stopped = threading.Event()
+
+    def beat():
+        try:
+            while not stopped.wait(settings.MEDIA_JOB_TIMEOUT / 3):
+                claimed_by(job).update(updated_at=timezone.now())
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job):
+    """Выполнение задачи с повтором через экспоненциально растущую паузу."""
+    handler, on_failure = handlers.get(job.kind, (None, None))
+    try:
+        if handler is None:
+            raise PermanentJobError(f'Неизвестный вид задачи {job.kind}')
+        with heartbeat(job):
+            handler(**job.payload)
+    except Exception as exc:
+        logger.exception('Задача %s (%s) завершилась ошибкой', job.id, job.kind)
+        job.last_error = f'{type(exc).__name__}: {exc}'
+        if isinstance(exc, PermanentJobError) or job.attempts >= job.max_attempts:
+            job.status = models.MediaJob.FAILED
+            if on_failure is not None:
+                on_failure(**job.payload)
+        else:
+            job.status = models.MediaJob.PENDING
+            job.run_after = timezone.now() + timedelta(
+                seconds=settings.MEDIA_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+    else:
+        job.status = models.MediaJob.DONE
+    job.updated_at = timezone.now()
+    saved = claimed_by(job).update(
+        status=job.status, run_after=job.run_after, last_error=job.last_error, updated_at=job.updated_at
+    )
+    if not saved:
+        logger.warning('Задача %s (%s) захвачена повторно, результат попытки %s отброшен', job.id, job.kind, job.attempts)
+    return job
@@ -0,0 +1,135 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from sound import models
+from sound.services.cache import bump_versions, get_title_scopes
+from sound.services.charts import add_to_buckets
+
+logger = logging.getLogger(__name__)
+
+
+class ListenBuffer:
+    """Буфер прослушиваний процесса с отложенной записью в базу.
+
+    Повторное прослушивание той же аудиозаписи тем же пользователем в
+    пределах LISTEN_DEDUP_WINDOW не учитывается. События пишутся одним
+    bulk_create, счётчики play_count — одним UPDATE на всю пачку.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.seen = {}
+        self.flushed_at = time.monotonic()
+        self.failures = 0
+
+    def record(self, user_id, title_id):
+        now = time.monotonic()
+        key = (user_id, title_id)
+        with self.lock:
+            last = self.seen.get(key)
+            if last is not None and now - last < settings.LISTEN_DEDUP_WINDOW:
+                return False
+            self.seen[key] = now
+            self.events.append(models.ListenEvent(
+                user_id=user_id,
+                title_id=title_id,
+                day=timezone.localdate(),
+                create_at=timezone.now(),
+            ))
+        return True
+
+    def is_due(self):
+        return len(self.events) >= settings.LISTEN_BUFFER_SIZE or (
+            self.events and time.monotonic() - self.flushed_at >= settings.LISTEN_FLUSH_INTERVAL
+        )
+
+    def flush(self):
+        """Запись пачки; при ошибке базы события возвращаются в буфер до следующей попытки.
+
+        После LISTEN_FLUSH_MAX_ATTEMPTS неудач подряд пачка отбрасывается, а из
+        буфера больше LISTEN_BUFFER_MAX событий отбрасываются самые старые.
+        """
+        with self.lock:
+            events, self.events = self.events, []
+            self.flushed_at = now = time.monotonic()
+            self.seen = {key: last for key, last in self.seen.items() if now - last < settings.LISTEN_DEDUP_WINDOW}
+        if not events:
+            return 0
+        try:
+            with transaction.atomic():
+                events = drop_deleted_references(events)
+                models.ListenEvent.objects.bulk_create(events, batch_size=settings.LISTEN_BUFFER_SIZE)
+                counts = Counter(event.title_id for event in events)
+                increment_play_counts(counts)
+                add_to_buckets(counts, 'listens')
+        except DatabaseError:
+            with self.lock:
+                self.failures += 1
+                if self.failures >= settings.LISTEN_FLUSH_MAX_ATTEMPTS:
+                    logger.exception('Не удалось записать %s прослушиваний за %s попыток, события отброшены',
+                                     len(events), self.failures)
+                    self.failures = 0
+                    return 0
+                logger.exception('Не удалось записать %s прослушиваний, повтор при следующей выгрузке', len(events))
+                self.events[:0] = events
+                overflow = len(self.events) - settings.LISTEN_BUFFER_MAX
+                if overflow > 0:
+                    del self.events[:overflow]
+                    logger.error('Буфер прослушиваний переполнен, отброшено %s старых событий', overflow)
+            return 0
+        self.failures = 0
+        return len(events)
+
+
+def drop_deleted_references(events):
+    """События удалённых за время буферизации аудиозаписей отбрасываются, удалённые пользователи обнуляются."""
+    title_ids = set(models.Title.objects.filter(
+        id__in={event.title_id for event in events}
+    ).values_list('id', flat=True))
+    user_ids = set(models.User.objects.filter(
+        id__in={event.user_id for event in events if event.user_id is not None}
+    ).values_list('id', flat=True))
+    events = [event for event in events if event.title_id in title_ids]
+    for event in events:
+        if event.user_id not in user_ids:
+            event.user_id = None
+    return events
+
+
+def increment_play_counts(counts):
+    """Прибавление прослушиваний к play_count всех аудиозаписей пачки одним запросом."""
+    if not counts:
+        return
+    increment = Case(
+        *(When(id=title_id, then=Value(count)) for title_id, count in counts.items()),
+        default=Value(0),
+    )
+    models.Title.objects.filter(id__in=counts).update(
+        play_count=F('play_count') + increment,
+        updated_at=timezone.now(),
+    )
+    bump_versions(*get_title_scopes(counts))
+
+
+listen_buffer = ListenBuffer()
+
+
+def record_listen(user, title):
+    return listen_buffer.record(user.id if user.is_authenticated else None, title.id)
+
+
+def flush_listens_if_due():
+    if listen_buffer.is_due():
+        listen_buffer.flush()
+
+
+atexit.register(listen_buffer.flush)
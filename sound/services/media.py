@@ -0,0 +1,292 @@
+import math
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from sound import models
+from sound.services.cache import bump_versions, get_owner_scope, get_title_scopes
+from sound.services.cleanup import delete_files_on_commit
+from sound.services.images import generate_thumbnails
+from sound.services.jobs import PermanentJobError, enqueue, register
+from sound.services.mp3 import build_seek_table, get_audio_end
+from sound.services.search import index_title
+from sound.services.services import delete_old_directory, get_title_segments_path
+from sound.services.streaming import build_stream_url
+
+SEGMENT_NAME = '{:05d}.mp3'
+UPLOAD_BLOCK_SIZE = 64 * 1024
+
+
+class UploadConflict(Exception):
+    """Смещение части не совпадает с уже принятым размером загрузки."""
+
+
+def adopt_title_file(title):
+    """Перенос файла, принятого частями, в хранилище с адресацией по содержимому."""
+    storage = title.file.storage
+    if not hasattr(storage, 'adopt'):
+        return
+    name = storage.adopt(title.file.name)
+    if name != title.file.name:
+        title.file.name = name
+        models.Title.objects.filter(id=title.id).update(file=name, updated_at=timezone.now())
+
+
+def validate_title_file(title):
+    """Проверки поля file (сигнатура AudioValidator) для файла, принятого частями мимо формы."""
+    field = models.Title._meta.get_field('file')
+    with title.file.open('rb'):
+        try:
+            field.run_validators(title.file)
+        except ValidationError as exc:
+            raise PermanentJobError(f'Файл {title.file.name} не прошёл проверку: {"; ".join(exc.messages)}')
+
+
+def update_seek_index(title):
+    """Построение таблицы перемотки по файлу аудиозаписи."""
+    table = build_seek_table(title.file.path)
+    if table is None:
+        models.SeekIndex.objects.filter(title=title).delete()
+        return None
+    models.SeekIndex.objects.update_or_create(
+        title=title,
+        defaults={
+            'sample_rate': table.sample_rate,
+            'samples_per_frame': table.samples_per_frame,
+            'duration': table.duration,
+            'offsets': table.to_bytes(),
+            'segment_frames': 0,
+        },
+    )
+    return table
+
+
+def get_seek_position(title, seconds):
+    """Смещение в байтах и время начала фрейма для момента seconds, None если таблицы нет."""
+    seek_index = models.SeekIndex.objects.filter(title=title).first()
+    if seek_index is None:
+        return None
+    return seek_index.get_seek_table().offset_at(seconds)
+
+
+def segment_title(title, table):
+    """Нарезка аудиозаписи на сегменты HLS по границам фреймов."""
+    directory = title.file.storage.path(get_title_segments_path(title.file.name))
+    delete_old_directory(directory)
+    os.makedirs(directory)
+
+    frames = math.ceil(settings.HLS_SEGMENT_DURATION / table.frame_duration)
+    with open(title.file.path, 'rb') as source:
+        end = get_audio_end(source)
+        for number, first in enumerate(range(0, len(table), frames)):
+            start = table.offsets[first]
+            stop = table.offsets[first + frames] if first + frames < len(table) else end
+            source.seek(start)
+            with open(os.path.join(directory, SEGMENT_NAME.format(number)), 'wb') as segment:
+                segment.write(source.read(stop - start))
+    models.SeekIndex.objects.filter(title=title).update(segment_frames=frames)
+
+
+def mark_title_failed(title_id):
+    models.Title.objects.filter(id=title_id).update(status=models.ProcessingStatus.FAILED, updated_at=timezone.now())
+    bump_versions(*get_title_scopes([title_id]))
+
+
+@register('process_title', on_failure=mark_title_failed)
+def process_title_file(title_id):
+    """Обработка нового файла аудиозаписи.
+
+    Проверка сигнатуры и полная проверка MP3 потока, длительность и таблица перемотки, сегменты HLS.
+    Запись попадает в поиск и ленты подписчиков только после перехода в READY.
+    """
+    title = models.Title.objects.filter(id=title_id).first()
+    if title is None or not title.file:
+        return
+    validate_title_file(title)
+    adopt_title_file(title)
+    table = update_seek_index(title)
+    if table is None:
+        raise PermanentJobError(f'В файле {title.file.name} нет MP3 фреймов')
+    segment_title(title, table)
+    models.Title.objects.filter(id=title_id).update(status=models.ProcessingStatus.READY, updated_at=timezone.now())
+    title.status = models.ProcessingStatus.READY
+    index_title(title)
+    if not title.private:
+        enqueue('fan_out_title', title_id=title_id)
+    bump_versions(*get_title_scopes([title_id]))
+
+
+def mark_cover_failed(model, object_id):
+    queryset = apps.get_model('sound', model).objects.filter(id=object_id)
+    queryset.update(status=models.ProcessingStatus.FAILED, updated_at=timezone.now())
+    bump_versions(*map(get_owner_scope, queryset.values_list('user_id', flat=True)))
+
+
+@register('process_cover', on_failure=mark_cover_failed)
+def process_cover(model, object_id):
+    """Полная проверка обложки альбома или плейлиста: изображение декодируется целиком."""
+    queryset = apps.get_model('sound', model).objects.filter(id=object_id)
+    instance = queryset.first()
+    if instance is None:
+        return
+    if instance.cover:
+        try:
+            with Image.open(instance.cover.path) as image:
+                image.load()
+        except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+            raise PermanentJobError(f'Повреждённое изображение {instance.cover.name}: {exc}')
+        generate_thumbnails(instance.cover.storage, instance.cover.name)
+    queryset.update(status=models.ProcessingStatus.READY, updated_at=timezone.now())
+    bump_versions(get_owner_scope(instance.user_id))
+
+
+@register('generate_thumbnails')
+def generate_image_thumbnails(app_label, model, object_id, field):
+    """Уменьшенные копии обложки аудиозаписи или аватара пользователя."""
+    instance = apps.get_model(app_label, model).objects.filter(id=object_id).first()
+    image = getattr(instance, field, None)
+    if image:
+        try:
+            generate_thumbnails(image.storage, image.name)
+        except Image.DecompressionBombError as exc:
+            raise PermanentJobError(f'Слишком большое изображение {image.name}: {exc}')
+
+
+def get_segment_url(title, name):
+    """Сегменты, как и файлы аудиозаписей, nginx отдаёт только по подписанным ссылкам."""
+    if settings.STREAM_URL_SECRET:
+        return build_stream_url(name)[0]
+    return title.file.storage.url(name)
+
+
+def build_hls_playlist(title, seek_index):
+    """Плейлист .m3u8 по нарезанным сегментам аудиозаписи."""
+    table = seek_index.get_seek_table()
+    frames = seek_index.segment_frames
+    directory = get_title_segments_path(title.file.name)
+    durations = [
+        min(frames, len(table) - first) * table.frame_duration
+        for first in range(0, len(table), frames)
+    ]
+    lines = [
+        '#EXTM3U',
+        '#EXT-X-VERSION:3',
+        '#EXT-X-PLAYLIST-TYPE:VOD',
+        f'#EXT-X-TARGETDURATION:{math.ceil(max(durations))}',
+        '#EXT-X-MEDIA-SEQUENCE:0',
+    ]
+    for number, duration in enumerate(durations):
+        lines.append(f'#EXTINF:{duration:.3f},')
+        lines.append(get_segment_url(title, directory + SEGMENT_NAME.format(number)))
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines) + '\n'
+
+
+def reserve_upload_file(user, name, filename):
+    """Создание пустого итогового файла докачиваемой загрузки, возвращает имя в хранилище."""
+    field = models.Title._meta.get_field('file')
+    file_name = field.generate_filename(models.Title(user=user, name=name), filename)
+    os.makedirs(os.path.dirname(field.storage.path(file_name)), exist_ok=True)
+    while True:
+        try:
+            open(field.storage.path(file_name), 'xb').close()
+            return file_name
+        except FileExistsError:
+            file_name = field.storage.get_alternative_name(*os.path.splitext(file_name))
+
+
+def append_upload_chunk(upload, stream, size):
+    """Дописывание части из stream в файл загрузки с текущего смещения.
+
+    Часть сначала принимается во временный файл и попадает в файл загрузки
+    только после захвата смещения, поэтому из двух запросов с одним смещением
+    пишет один. Принятые байты учитываются и при обрыве соединения, чтобы
+    клиент продолжил с них. Возвращает новое смещение.
+    """
+    written = 0
+    claimed = True
+    with tempfile.TemporaryFile() as chunk:
+        try:
+            while written < size:
+                block = stream.read(min(UPLOAD_BLOCK_SIZE, size - written))
+                if not block:
+                    break
+                chunk.write(block)
+                written += len(block)
+        finally:
+            if written:
+                claimed = write_upload_chunk(upload, chunk, written)
+    if not claimed:
+        raise UploadConflict
+    return upload.offset + written
+
+
+def write_upload_chunk(upload, chunk, size):
+    """Захват смещения UPDATE по старому значению и запись части в той же транзакции.
+
+    Конкурент с тем же смещением ждёт фиксации и не находит строку; при ошибке
+    записи смещение откатывается. False, если смещение уже занято.
+    """
+    field = models.Title._meta.get_field('file')
+    with transaction.atomic():
+        claimed = models.Upload.objects.filter(id=upload.id, offset=upload.offset).update(
+            offset=upload.offset + size, updated_at=timezone.now()
+        )
+        if not claimed:
+            return False
+        chunk.seek(0)
+        with open(field.storage.path(upload.file_name), 'r+b') as file:
+            file.seek(upload.offset)
+            shutil.copyfileobj(chunk, file, UPLOAD_BLOCK_SIZE)
+    return True
+
+
+def finish_upload(upload, **fields):
+    """Создание аудиозаписи из полностью принятой загрузки без копирования файла."""
+    with transaction.atomic():
+        title = models.Title(
+            user=upload.user,
+            name=upload.name,
+            file=upload.file_name,
+            status=models.ProcessingStatus.PROCESSING,
+            **fields,
+        )
+        title.save()
+        enqueue('process_title', title_id=title.id)
+        upload.delete()
+    return title
+
+
+def cancel_upload(upload):
+    """Прерывание загрузки: удаление сессии, принятая часть файла удаляется после фиксации."""
+    with transaction.atomic():
+        upload.delete()
+        delete_files_on_commit(upload.file_name)
+
+
+def get_upload_expiry(ttl=None):
+    """Загрузка без новых частей с этого момента брошена; ttl по умолчанию UPLOAD_TTL."""
+    return timezone.now() - timedelta(seconds=settings.UPLOAD_TTL if ttl is None else ttl)
+
+
+def expire_uploads(ttl=None):
+    """Отмена брошенных загрузок с удалением принятых частей, возвращает число отменённых.
+
+    Сессия удаляется повторной проверкой срока: часть, принятая тем временем, её сохраняет.
+    """
+    stale = models.Upload.objects.filter(updated_at__lt=get_upload_expiry(ttl))
+    expired = 0
+    for upload in stale.only('id', 'file_name').iterator():
+        with transaction.atomic():
+            if stale.filter(id=upload.id).delete()[0]:
+                delete_files_on_commit(upload.file_name)
+                expired += 1
+    return expired
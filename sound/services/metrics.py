@@ -0,0 +1,208 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from glob import glob
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = tuple(256 * 4 ** power for power in range(10))
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UPLOAD_DURATION_BUCKETS = (1, 5, 15, 60, 300, 900, 3600, 4 * 3600)
+
+
+class Metric:
+    def __init__(self, name, documentation, kind, labelnames, buckets=None):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = labelnames
+        self.buckets = buckets
+        METRICS.append(self)
+
+    def inc(self, *labels, amount=1):
+        registry.add(self, labels, amount)
+
+    def observe(self, value, *labels):
+        registry.add(self, labels, value)
+
+
+METRICS = []
+
+REQUEST_DURATION = Metric('sound_request_duration_seconds', 'Время ответа на запрос.', 'histogram',
+                          ('viewset', 'action'), LATENCY_BUCKETS)
+REQUESTS = Metric('sound_requests_total', 'Запросы по кодам ответа.', 'counter', ('viewset', 'action', 'status'))
+RESPONSE_SIZE = Metric('sound_response_size_bytes', 'Размер тела ответа без потоковых ответов.', 'histogram',
+                       ('viewset', 'action'), SIZE_BUCKETS)
+DB_QUERIES = Metric('sound_db_queries', 'SQL запросы на один HTTP запрос.', 'histogram',
+                    ('viewset', 'action'), QUERY_BUCKETS)
+MEDIA_RESPONSES = Metric('sound_media_responses_total', 'Ответы отдачи аудио: full, range, accel, not_modified.',
+                         'counter', ('action', 'kind'))
+MEDIA_BYTES = Metric('sound_media_bytes_total', 'Байты аудио, отданные Django (без X-Accel-Redirect).', 'counter',
+                     ('action', 'kind'))
+UPLOAD_DURATION = Metric('sound_upload_duration_seconds', 'Время от создания сессии загрузки до finish.',
+                         'histogram', (), UPLOAD_DURATION_BUCKETS)
+UPLOAD_SIZE = Metric('sound_upload_size_bytes', 'Размер завершённых загрузок.', 'histogram', (), SIZE_BUCKETS)
+
+
+class Registry:
+    """Значения метрик процесса.
+
+    С METRICS_DIR каждый процесс раз в METRICS_FLUSH_INTERVAL пишет свои
+    значения в отдельный файл каталога, а выгрузка суммирует файлы всех
+    процессов; файлы завершившихся процессов остаются, поэтому счётчики
+    сервера не убывают до очистки каталога при запуске. Без METRICS_DIR
+    выгрузка показывает только текущий процесс.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        """Новый процесс начинает с нуля и пишет в свой файл, значения родителя остаются в его файле."""
+        self.values = {}
+        self.flushed_at = 0
+        self.path = None
+
+    def add(self, metric, labels, value):
+        key = (metric.name, labels)
+        with self.lock:
+            if metric.kind == 'counter':
+                self.values[key] = self.values.get(key, 0) + value
+                return
+            counts = self.values.get(key)
+            if counts is None:
+                # Счётчики по корзинам, последняя — +Inf, затем сумма наблюдений.
+                counts = self.values[key] = [0] * (len(metric.buckets) + 2)
+            position = next((index for index, bound in enumerate(metric.buckets) if value <= bound),
+                            len(metric.buckets))
+            counts[position] += 1
+            counts[-1] += value
+
+    def get_path(self):
+        if self.path is None:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            self.path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}-{time.time_ns()}.json')
+        return self.path
+
+    def flush(self):
+        if not settings.METRICS_DIR:
+            return
+        with self.lock:
+            snapshot = [[name, list(labels), value] for (name, labels), value in self.values.items()]
+            self.flushed_at = time.monotonic()
+        path = self.get_path()
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path), delete=False, suffix='.tmp') as temporary:
+            json.dump(snapshot, temporary, separators=(',', ':'))
+        os.replace(temporary.name, path)
+
+    def flush_if_due(self):
+        if settings.METRICS_DIR and time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def collect(self):
+        if not settings.METRICS_DIR:
+            with self.lock:
+                return {key: list(value) if isinstance(value, list) else value for key, value in self.values.items()}
+        self.flush()
+        merged = {}
+        for path in glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            try:
+                with open(path) as file:
+                    samples = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in samples:
+                key = (name, tuple(labels))
+                if isinstance(value, list):
+                    total = merged.setdefault(key, [0] * len(value))
+                    for index, count in enumerate(value):
+                        total[index] += count
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+
+registry = Registry()
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics(values):
+    """Текстовый формат Prometheus 0.0.4."""
+    samples = {}
+    for (name, labels), value in values.items():
+        samples.setdefault(name, []).append((labels, value))
+    lines = []
+    for metric in METRICS:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for labels, value in sorted(samples.get(metric.name, ())):
+            pairs = list(zip(metric.labelnames, labels))
+            if metric.kind == 'counter':
+                lines.append(f'{metric.name}{format_labels(pairs)} {format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip((*metric.buckets, '+Inf'), value[:-1]):
+                cumulative += count
+                lines.append(f'{metric.name}_bucket{format_labels([*pairs, ("le", bound)])} {cumulative}')
+            lines.append(f'{metric.name}_sum{format_labels(pairs)} {format_value(value[-1])}')
+            lines.append(f'{metric.name}_count{format_labels(pairs)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_view_labels(view_func, method):
+    """(viewset, action) для меток: имя класса DRF и действие, для функций — имя и метод."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return view_func.__name__, method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    return view_class.__name__, actions.get(method.lower(), method.lower())
+
+
+MEDIA_ACTIONS = ('streaming_title', 'download_title')
+
+
+def record_media_response(action, response):
+    if response.has_header('X-Accel-Redirect'):
+        kind = 'accel'
+    elif response.status_code == 206:
+        kind = 'range'
+    elif response.status_code == 304:
+        kind = 'not_modified'
+    elif response.status_code == 200:
+        kind = 'full'
+    else:
+        return
+    MEDIA_RESPONSES.inc(action, kind)
+    if kind in ('full', 'range') and response.has_header('Content-Length'):
+        MEDIA_BYTES.inc(action, kind, amount=int(response['Content-Length']))
+
+
+def record_request(labels, response, duration, queries):
+    viewset, action = labels
+    REQUEST_DURATION.observe(duration, viewset, action)
+    REQUESTS.inc(viewset, action, str(response.status_code))
+    DB_QUERIES.observe(queries, viewset, action)
+    if not response.streaming:
+        RESPONSE_SIZE.observe(len(response.content), viewset, action)
+    if action in MEDIA_ACTIONS:
+        record_media_response(action, response)
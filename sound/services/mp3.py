@@ -0,0 +1,190 @@
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+ID3V2_HEADER_SIZE = 10
+ID3V1_SIZE = 128
+
+# Битрейты в кбит/с по (версия MPEG, слой), индекс — 4 бита заголовка фрейма.
+BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+
+class FrameHeader:
+    """Разобранный заголовок MPEG аудио фрейма."""
+    __slots__ = ('version', 'layer', 'sample_rate', 'samples', 'length')
+
+    def __init__(self, version, layer, sample_rate, samples, length):
+        self.version = version
+        self.layer = layer
+        self.sample_rate = sample_rate
+        self.samples = samples
+        self.length = length
+
+
+def parse_frame_header(data, pos):
+    """Разбор 4 байт заголовка фрейма, None если по смещению нет фрейма."""
+    if pos + 4 > len(data):
+        return None
+    header, = struct.unpack_from('>I', data, pos)
+    if header & 0xFFE00000 != 0xFFE00000:
+        return None
+    version = VERSIONS.get((header >> 19) & 0b11)
+    layer = LAYERS.get((header >> 17) & 0b11)
+    bitrate_index = (header >> 12) & 0b1111
+    sample_rate_index = (header >> 10) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    bitrate = BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    padding = (header >> 9) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 576 if layer == 3 and version != 1 else 1152
+        length = samples // 8 * bitrate // sample_rate + padding
+    return FrameHeader(version, layer, sample_rate, samples, length)
+
+
+def skip_id3v2(data):
+    """Смещение первого байта после ID3v2 тегов в начале файла."""
+    pos = 0
+    while data[pos:pos + 3] == b'ID3' and pos + ID3V2_HEADER_SIZE <= len(data):
+        flags = data[pos + 5]
+        size = 0
+        for byte in data[pos + 6:pos + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        pos += ID3V2_HEADER_SIZE + size + (ID3V2_HEADER_SIZE if flags & 0x10 else 0)
+    return pos
+
+
+def is_info_frame(data, pos, frame):
+    """Первый фрейм VBR файлов (Xing/Info/VBRI) не содержит звука."""
+    body = data[pos + 4:pos + min(frame.length, 64)]
+    return b'Xing' in body or b'Info' in body or b'VBRI' in body
+
+
+class SeekTable:
+    """Таблица перемотки: смещение в байтах начала каждого аудиофрейма.
+
+    Все фреймы файла имеют одинаковое число сэмплов, поэтому номер фрейма
+    для момента времени вычисляется делением, а смещение — чтением массива.
+    """
+    typecode = 'I'
+
+    def __init__(self, sample_rate, samples_per_frame, offsets):
+        self.sample_rate = sample_rate
+        self.samples_per_frame = samples_per_frame
+        self.offsets = offsets
+
+    @property
+    def frame_duration(self):
+        return self.samples_per_frame / self.sample_rate
+
+    @property
+    def duration(self):
+        return len(self.offsets) * self.frame_duration
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def frame_at(self, seconds):
+        """Номер фрейма, который звучит в момент seconds."""
+        frame = int(max(seconds, 0) / self.frame_duration)
+        return min(frame, len(self.offsets) - 1)
+
+    def frame_at_offset(self, offset):
+        """Номер первого фрейма, начинающегося не раньше offset."""
+        return bisect_left(self.offsets, offset)
+
+    def offset_at(self, seconds):
+        """Смещение начала фрейма и точное время этого фрейма."""
+        frame = self.frame_at(seconds)
+        return self.offsets[frame], frame * self.frame_duration
+
+    def to_bytes(self):
+        offsets = array(self.typecode, self.offsets)
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        return offsets.tobytes()
+
+    @classmethod
+    def from_bytes(cls, sample_rate, samples_per_frame, data):
+        offsets = array(cls.typecode)
+        offsets.frombytes(bytes(data))
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        return cls(sample_rate, samples_per_frame, offsets)
+
+
+def scan_frames(data):
+    """Разбор потока MPEG фреймов, возвращает SeekTable или None если фреймов нет.
+
+    Заголовки, не совпадающие с первым фреймом по версии, слою и частоте,
+    считаются ложной синхронизацией и пропускаются.
+    """
+    offsets = array(SeekTable.typecode)
+    first = None
+    pos = skip_id3v2(data)
+    end = len(data)
+    while pos < end:
+        frame = parse_frame_header(data, pos)
+        valid = frame is not None and (first is None or (
+            frame.version == first.version
+            and frame.layer == first.layer
+            and frame.sample_rate == first.sample_rate
+        ))
+        if not valid:
+            if data[pos:pos + 3] == b'TAG':
+                break
+            pos = data.find(b'\xff', pos + 1)
+            if pos == -1:
+                break
+            continue
+        if first is None:
+            first = frame
+            if is_info_frame(data, pos, frame):
+                pos += frame.length
+                continue
+        offsets.append(pos)
+        pos += frame.length
+    if first is None or not offsets:
+        return None
+    return SeekTable(first.sample_rate, first.samples, offsets)
+
+
+def get_audio_end(file):
+    """Конец аудиоданных в открытом файле: без ID3v1 тега в последних 128 байтах."""
+    size = file.seek(0, 2)
+    if size >= ID3V1_SIZE:
+        file.seek(size - ID3V1_SIZE)
+        if file.read(3) == b'TAG':
+            return size - ID3V1_SIZE
+    return size
+
+
+def build_seek_table(path):
+    """Построение таблицы перемотки по MP3 файлу на диске."""
+    with open(path, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+        with data:
+            return scan_frames(data)
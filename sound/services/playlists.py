@@ -0,0 +1,127 @@
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, Max, Value, When
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
+
+from sound import models
+from sound.services.cache import bump_versions, get_owner_scope
+
+# Позиция «в конец плейлиста»; None означает «в начало».
+END = object()
+STEP = models.PlaylistTitle.POSITION_STEP
+UPDATE_BATCH_SIZE = 500
+
+
+def get_title_ids(playlist):
+    return list(models.PlaylistTitle.objects.filter(playlist=playlist).order_by('position', 'id').values_list(
+        'title_id', flat=True
+    ))
+
+
+def lock_playlist(playlist):
+    """Блокировка строки плейлиста: параллельные изменения не займут одни и те же позиции."""
+    models.Playlist.objects.select_for_update().filter(id=playlist.id).exists()
+
+
+def send_changed(playlist, action, title_ids):
+    """Те же m2m_changed, что и у playlist.titles: счётчики, чарты, похожие и кеш обновляют общие обработчики."""
+    m2m_changed.send(
+        sender=models.PlaylistTitle, instance=playlist, action=action, reverse=False,
+        model=models.Title, pk_set=set(title_ids), using=playlist._state.db,
+    )
+
+
+def renumber(playlist):
+    """Равномерные позиции с шагом STEP в текущем порядке, пачками по одному UPDATE."""
+    ids = list(models.PlaylistTitle.objects.filter(playlist=playlist).order_by('position', 'id').values_list(
+        'id', flat=True
+    ))
+    for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+        batch = ids[start:start + UPDATE_BATCH_SIZE]
+        models.PlaylistTitle.objects.filter(id__in=batch).update(position=Case(
+            *(When(id=entry_id, then=Value((start + offset + 1) * STEP)) for offset, entry_id in enumerate(batch)),
+            default=F('position'),
+            output_field=BigIntegerField(),
+        ))
+
+
+def allocate(playlist, count, after, exclude=()):
+    """count свободных позиций подряд после аудиозаписи after.
+
+    Читаются только соседние позиции; перенумерация нужна, лишь когда
+    между соседями не осталось места.
+    """
+    entries = models.PlaylistTitle.objects.filter(playlist=playlist).exclude(title_id__in=exclude)
+    if after is END:
+        low, high = entries.aggregate(position=Max('position'))['position'], None
+    else:
+        low = None if after is None else entries.filter(title_id=after).values_list('position', flat=True).get()
+        following = entries if low is None else entries.filter(position__gt=low)
+        high = following.order_by('position').values_list('position', flat=True).first()
+    if high is None:
+        start = 0 if low is None else low
+        return [start + STEP * offset for offset in range(1, count + 1)]
+    if low is None:
+        return [high - STEP * offset for offset in range(count, 0, -1)]
+    if high - low > count:
+        return [low + (high - low) * offset // (count + 1) for offset in range(1, count + 1)]
+    renumber(playlist)
+    return allocate(playlist, count, after, exclude)
+
+
+def add_titles(playlist, title_ids, after=END):
+    """Добавление аудиозаписей подряд после after одной вставкой; уже добавленные пропускаются.
+
+    Возвращает id добавленных аудиозаписей.
+    """
+    with transaction.atomic():
+        lock_playlist(playlist)
+        existing = set(models.PlaylistTitle.objects.filter(playlist=playlist, title_id__in=title_ids).values_list(
+            'title_id', flat=True
+        ))
+        added = [title_id for title_id in dict.fromkeys(title_ids) if title_id not in existing]
+        if not added:
+            return []
+        send_changed(playlist, 'pre_add', added)
+        positions = allocate(playlist, len(added), after)
+        models.PlaylistTitle.objects.bulk_create(
+            models.PlaylistTitle(playlist=playlist, title_id=title_id, position=position)
+            for title_id, position in zip(added, positions)
+        )
+        send_changed(playlist, 'post_add', added)
+    return added
+
+
+def remove_titles(playlist, title_ids):
+    """Удаление аудиозаписей из плейлиста одним DELETE, возвращает id удалённых."""
+    with transaction.atomic():
+        removed = set(models.PlaylistTitle.objects.filter(playlist=playlist, title_id__in=title_ids).values_list(
+            'title_id', flat=True
+        ))
+        if not removed:
+            return removed
+        send_changed(playlist, 'pre_remove', removed)
+        models.PlaylistTitle.objects.filter(playlist=playlist, title_id__in=removed).delete()
+        send_changed(playlist, 'post_remove', removed)
+    return removed
+
+
+def move_titles(playlist, title_ids, after=END):
+    """Перенос аудиозаписей подряд после after; меняются только строки переносимых записей."""
+    with transaction.atomic():
+        lock_playlist(playlist)
+        entries = dict(models.PlaylistTitle.objects.filter(playlist=playlist, title_id__in=title_ids).values_list(
+            'title_id', 'id'
+        ))
+        moved = [title_id for title_id in dict.fromkeys(title_ids) if title_id in entries]
+        if not moved:
+            return moved
+        positions = allocate(playlist, len(moved), after, exclude=moved)
+        models.PlaylistTitle.objects.filter(id__in=entries.values()).update(position=Case(
+            *(When(title_id=title_id, then=Value(position)) for title_id, position in zip(moved, positions)),
+            default=F('position'),
+            output_field=BigIntegerField(),
+        ))
+        models.Playlist.objects.filter(id=playlist.id).update(updated_at=timezone.now())
+        bump_versions(get_owner_scope(playlist.user_id))
+    return moved
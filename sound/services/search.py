@@ -0,0 +1,108 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from sound import models
+from sound.services.jobs import register
+
+FTS_TABLE = 'sound_title_fts'
+SEARCH_CONFIG = 'simple'
+TOKEN_RE = re.compile(r'\w+')
+
+
+def build_search_document(title):
+    """Текст для поиска: название, автор, альбом и жанры аудиозаписи."""
+    parts = [title.name, title.user.username]
+    if title.album_id:
+        parts.append(title.album.name)
+    parts.extend(genre.name for genre in title.genre.all())
+    return ' '.join(parts)
+
+
+def index_title(title):
+    """Обновление поискового документа аудиозаписи.
+
+    В FTS5 таблицу попадают только публичные обработанные записи.
+    """
+    document = build_search_document(title)
+    models.Title.objects.filter(id=title.id).update(search_document=document)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title.id])
+            if not title.private and title.status == models.ProcessingStatus.READY:
+                cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, document) VALUES (%s, %s)', [title.id, document])
+
+
+def unindex_title(title_id):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title_id])
+
+
+def index_inserted_titles(first_id):
+    """Индексация аудиозаписей с id от first_id одним запросом, после bulk_create с готовым search_document."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, document) '
+                'SELECT id, search_document FROM sound_title WHERE id >= %s AND NOT private AND status = %s',
+                [first_id, models.ProcessingStatus.READY],
+            )
+
+
+@register('reindex_titles')
+def reindex_titles(**filters):
+    """Переиндексация аудиозаписей после переименования автора, альбома или жанра."""
+    queryset = models.Title.objects.filter(**filters).select_related('user', 'album').prefetch_related('genre')
+    for title in queryset.iterator(chunk_size=500):
+        index_title(title)
+
+
+def get_public_titles():
+    return models.Title.objects.filter(private=False, status=models.ProcessingStatus.READY).prefetch_related('genre')
+
+
+def search_titles(query, limit):
+    """Публичные аудиозаписи по запросу, от наиболее релевантных."""
+    tokens = TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return []
+    if connection.vendor == 'postgresql':
+        return list(_search_postgresql(query, tokens)[:limit])
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(tokens, limit)
+    queryset = get_public_titles()
+    for token in tokens:
+        queryset = queryset.filter(search_document__icontains=token)
+    return list(queryset.order_by('-create_at', '-id')[:limit])
+
+
+def _search_postgresql(query, tokens):
+    """Полнотекстовый поиск по префиксам слов, опечатки находит триграммный индекс.
+
+    Выражения совпадают с индексами из миграции, поэтому оба условия
+    проверяются по GIN индексам, а не перебором таблицы.
+    """
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+
+    vector = SearchVector('search_document', config=SEARCH_CONFIG)
+    ts_query = SearchQuery(' & '.join(f'{token}:*' for token in tokens), config=SEARCH_CONFIG, search_type='raw')
+    return get_public_titles().annotate(
+        document=vector,
+        rank=SearchRank(vector, ts_query) + TrigramWordSimilarity(query, 'search_document'),
+    ).filter(
+        Q(document=ts_query) | Q(search_document__trigram_word_similar=query)
+    ).order_by('-rank', '-id')
+
+
+def _search_sqlite(tokens, limit):
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}) LIMIT %s',
+            [match, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    titles = get_public_titles().filter(id__in=ids).in_bulk()
+    return [titles[title_id] for title_id in ids if title_id in titles]
@@ -0,0 +1,171 @@
+import random
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db.models import Max
+
+from sound import models
+from sound.services.counters import repair_counters
+from sound.services.search import index_inserted_titles
+
+WORDS = (
+    'midnight', 'river', 'echo', 'neon', 'summer', 'ghost', 'velvet', 'city', 'lights', 'ocean', 'dream',
+    'fire', 'winter', 'golden', 'shadow', 'road', 'heart', 'storm', 'silver', 'moon', 'wild', 'blue',
+    'static', 'paper', 'glass', 'desert', 'rain', 'electric', 'slow', 'dance', 'north', 'last', 'signal',
+    'morning', 'honey', 'black', 'coast', 'falling', 'stone', 'orbit', 'wave', 'low', 'pulse', 'garden',
+)
+GENRES = (
+    'rock', 'pop', 'jazz', 'hip-hop', 'electronic', 'techno', 'house', 'ambient', 'classical', 'metal',
+    'punk', 'folk', 'blues', 'soul', 'funk', 'reggae', 'indie', 'drum and bass', 'lo-fi', 'soundtrack',
+)
+# Доля приватных аудиозаписей и плейлистов; показатель степени — насколько популярность сосредоточена в голове.
+PRIVATE_SHARE = 0.05
+SKEW = 3
+MAX_COMMENT_POSITION_MS = 240_000
+
+
+class Seeder:
+    """Синтетический каталог для нагрузочных замеров.
+
+    Строки вставляются bulk_create пачками по batch_size, без сигналов;
+    популярность авторов и аудиозаписей распределена неравномерно, как в
+    настоящем каталоге. Денормализованные счётчики и поисковый индекс
+    обновляются в конце одним проходом.
+    """
+
+    def __init__(self, batch_size=5000, seed=0, log=print):
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.log = log
+
+    def pick(self, ids):
+        """Элемент ids со смещением к началу списка: первые — самые популярные."""
+        return ids[int(len(ids) * self.random.random() ** SKEW)]
+
+    def name(self, words):
+        return ' '.join(self.random.choice(WORDS) for _ in range(words)).capitalize()
+
+    def get_next_id(self, model):
+        return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+    def insert(self, model, rows, ignore_conflicts=False):
+        """Вставка пачками; возвращает id, с которого начинаются новые строки."""
+        first_id = self.get_next_id(model)
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+        return first_id
+
+    def get_ids(self, model, first_id):
+        return list(model.objects.filter(id__gte=first_id).order_by('id').values_list('id', flat=True))
+
+    def seed_genres(self):
+        models.Genre.objects.bulk_create([models.Genre(name=name) for name in GENRES], ignore_conflicts=True)
+        return list(models.Genre.objects.values_list('id', flat=True))
+
+    def seed_users(self, count):
+        password = make_password(None)
+        start = self.get_next_id(models.User)
+        first_id = self.insert(models.User, (
+            models.User(
+                email=f'listener{number}@seed.example', username=f'listener{number}',
+                password=password, bio=self.name(6),
+            )
+            for number in range(start, start + count)
+        ))
+        users = dict(models.User.objects.filter(id__gte=first_id).order_by('id').values_list('id', 'username'))
+        self.log(f'Пользователей: {len(users)}')
+        return users
+
+    def seed_albums(self, count, users):
+        """Альбомы по авторам: {автор: [id альбомов]}."""
+        owners = list(users)
+        first_id = self.insert(models.Album, (
+            models.Album(user_id=self.random.choice(owners), name=self.name(2), description=self.name(12),
+                         private=self.random.random() < PRIVATE_SHARE)
+            for _ in range(count)
+        ))
+        albums = {}
+        for album_id, user_id in models.Album.objects.filter(id__gte=first_id).values_list('id', 'user_id'):
+            albums.setdefault(user_id, []).append(album_id)
+        self.log(f'Альбомов: {count}')
+        return albums
+
+    def seed_titles(self, count, users, albums, genre_ids):
+        authors = list(users)
+        self.random.shuffle(authors)
+        first_id = self.insert(models.Title, self.iter_titles(count, authors, users, albums))
+        title_ids = self.get_ids(models.Title, first_id)
+        self.insert(models.Title.genre.through, (
+            models.Title.genre.through(title_id=title_id, genre_id=genre_id)
+            for title_id in title_ids
+            for genre_id in self.random.sample(genre_ids, self.random.randint(1, 2))
+        ))
+        index_inserted_titles(first_id)
+        self.log(f'Аудиозаписей: {len(title_ids)}')
+        return title_ids
+
+    def iter_titles(self, count, authors, users, albums):
+        for number in range(count):
+            user_id = self.pick(authors)
+            name = self.name(self.random.randint(1, 4))
+            album_id = self.random.choice(albums[user_id]) if user_id in albums and self.random.random() < 0.5 else None
+            yield models.Title(
+                user_id=user_id, name=name, file=f'seed/{number}.mp3', album_id=album_id,
+                private=self.random.random() < PRIVATE_SHARE,
+                search_document=f'{name} {users[user_id]}',
+                play_count=int(100_000 * self.random.random() ** (SKEW * 2)),
+            )
+
+    def seed_follows(self, count, users):
+        followers = list(users)
+        popular = followers[:]
+        self.random.shuffle(popular)
+        self.insert(models.Follow, (
+            models.Follow(user_id=follower, subscriber_id=author)
+            for follower, author in (
+                (self.random.choice(followers), self.pick(popular)) for _ in range(count)
+            )
+            if follower != author
+        ), ignore_conflicts=True)
+        self.log(f'Подписок: {models.Follow.objects.count()}')
+
+    def seed_playlists(self, count, max_size, users, title_ids):
+        owners = list(users)
+        first_id = self.insert(models.Playlist, (
+            models.Playlist(user_id=self.random.choice(owners), name=self.name(2),
+                            private=self.random.random() < PRIVATE_SHARE)
+            for _ in range(count)
+        ))
+        playlist_ids = self.get_ids(models.Playlist, first_id)
+        self.insert(models.PlaylistTitle, (
+            models.PlaylistTitle(playlist_id=playlist_id, title_id=title_id,
+                                 position=(offset + 1) * models.PlaylistTitle.POSITION_STEP)
+            for playlist_id in playlist_ids
+            for offset, title_id in enumerate({
+                self.pick(title_ids): None for _ in range(self.random.randint(1, max_size))
+            })
+        ))
+        self.log(f'Плейлистов: {len(playlist_ids)}')
+
+    def seed_comments(self, count, users, title_ids):
+        authors = list(users)
+        self.insert(models.Comment, (
+            models.Comment(
+                user_id=self.random.choice(authors), title_id=self.pick(title_ids), text=self.name(8),
+                position_ms=self.random.randrange(MAX_COMMENT_POSITION_MS) if self.random.random() < 0.7 else None,
+            )
+            for _ in range(count)
+        ))
+        self.log(f'Комментариев: {count}')
+
+    def seed(self, users, albums, titles, follows, playlists, playlist_size, comments):
+        genre_ids = self.seed_genres()
+        users = self.seed_users(users)
+        albums = self.seed_albums(albums, users)
+        title_ids = self.seed_titles(titles, users, albums, genre_ids)
+        self.seed_follows(follows, users)
+        self.seed_playlists(playlists, playlist_size, users, title_ids)
+        self.seed_comments(comments, users, title_ids)
+        repair_counters()
+        self.log('Счётчики пересчитаны')
@@ -1,4 +1,5 @@
 import os
+import shutil
 
 from django.core.exceptions import ValidationError
 
@@ -33,13 +34,24 @@ def get_title_cover_upload_path(instance, filename):
     return os.path.join(path, new_filename)
 
 
+def get_title_segments_path(file_name):
+    """Построение пути к сегментам HLS, format: (media)/title/username/segments/{file}/"""
+    path, filename = os.path.split(file_name)
+    return os.path.join(path, 'segments', os.path.splitext(filename)[0], '')
+
+
 def validate_size_image(file_obj):
     """Проверка размера файла."""
     if file_obj.size > MEGABYTE_LIMIT * 1024 * 1024:
         raise ValidationError(f"Максимальный размер файла {MEGABYTE_LIMIT}MB")
 
 
-def delete_old_file(path_file):
-    """Удаление старого файла."""
-    if os.path.exists(path_file):
-        os.remove(path_file)
+def delete_old_file(field_file):
+    """Удаление старого файла через его хранилище."""
+    if field_file:
+        field_file.storage.delete(field_file.name)
+
+
+def delete_old_directory(path_directory):
+    """Удаление старой директории вместе с содержимым."""
+    shutil.rmtree(path_directory, ignore_errors=True)
@@ -0,0 +1,172 @@
+import heapq
+import logging
+import math
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from sound import models
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+logger = logging.getLogger(__name__)
+
+ROWS_CHUNK_SIZE = 1000
+RECENT_LISTENS = 100
+
+
+def load_playlist_pairs():
+    """Пары (плейлист, аудиозапись) без плейлистов длиннее SIMILAR_MAX_PLAYLIST_SIZE: они лишь шум."""
+    through = models.Playlist.titles.through
+    pairs = list(through.objects.values_list('playlist_id', 'title_id').iterator(chunk_size=10000))
+    sizes = Counter(playlist_id for playlist_id, _ in pairs)
+    return [(playlist_id, title_id) for playlist_id, title_id in pairs
+            if sizes[playlist_id] <= settings.SIMILAR_MAX_PLAYLIST_SIZE]
+
+
+def compute_similar_scipy(pairs, targets, k):
+    """Косинусная близость строк разреженной матрицы аудиозапись × плейлист.
+
+    Произведение M·Mᵀ считается блоками строк, поэтому память ограничена
+    размером блока, а не квадратом числа аудиозаписей.
+    """
+    playlist_ids, title_ids = np.array(pairs, dtype=np.int64).T
+    titles, rows = np.unique(title_ids, return_inverse=True)
+    _, columns = np.unique(playlist_ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(titles), columns.max() + 1),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    inverse_norms = 1 / np.sqrt(np.asarray(matrix.sum(axis=1)).ravel())
+    transposed = matrix.T.tocsc()
+
+    positions = np.arange(len(titles)) if targets is None else np.flatnonzero(np.isin(titles, list(targets)))
+    for start in range(0, len(positions), ROWS_CHUNK_SIZE):
+        chunk = positions[start:start + ROWS_CHUNK_SIZE]
+        scores = sparse.diags(inverse_norms[chunk]) @ (matrix[chunk] @ transposed) @ sparse.diags(inverse_norms)
+        scores = scores.tocsr()
+        for row, position in enumerate(chunk):
+            begin, end = scores.indptr[row], scores.indptr[row + 1]
+            others, values = scores.indices[begin:end], scores.data[begin:end]
+            keep = others != position
+            others, values = others[keep], values[keep]
+            if len(values) > k:
+                top = np.argpartition(-values, k)[:k]
+                others, values = others[top], values[top]
+            order = np.argsort(-values, kind='stable')
+            yield int(titles[position]), [(int(titles[other]), float(values[other_position]))
+                                          for other_position, other in zip(order, others[order])]
+
+
+def compute_similar_python(pairs, targets, k):
+    """То же без NumPy: подсчёт совместных вхождений по спискам плейлистов."""
+    playlist_titles = defaultdict(list)
+    title_playlists = defaultdict(list)
+    for playlist_id, title_id in set(pairs):
+        playlist_titles[playlist_id].append(title_id)
+        title_playlists[title_id].append(playlist_id)
+
+    for title_id in (title_playlists if targets is None else [t for t in targets if t in title_playlists]):
+        counts = Counter()
+        for playlist_id in title_playlists[title_id]:
+            counts.update(playlist_titles[playlist_id])
+        del counts[title_id]
+        norm = len(title_playlists[title_id])
+        scores = ((other, count / math.sqrt(norm * len(title_playlists[other]))) for other, count in counts.items())
+        yield title_id, heapq.nlargest(k, scores, key=itemgetter(1))
+
+
+def save_similar(rows):
+    """Замена списков похожих для посчитанных аудиозаписей, пачками по ROWS_CHUNK_SIZE."""
+    saved = 0
+    batch = {}
+
+    def write():
+        with transaction.atomic():
+            models.SimilarTitle.objects.filter(title_id__in=batch).delete()
+            models.SimilarTitle.objects.bulk_create(
+                models.SimilarTitle(title_id=title_id, similar_id=other, score=score)
+                for title_id, similar in batch.items() for other, score in similar
+            )
+        batch.clear()
+
+    for title_id, similar in rows:
+        batch[title_id] = similar
+        saved += 1
+        if len(batch) >= ROWS_CHUNK_SIZE:
+            write()
+    if batch:
+        write()
+    return saved
+
+
+def build_similar_titles(full=False):
+    """Пересчёт похожих аудиозаписей: всех или только отмеченных изменёнными плейлистами.
+
+    Возвращает число пересчитанных аудиозаписей.
+    """
+    dirty = None if full else set(models.SimilarityDirty.objects.values_list('title_id', flat=True))
+    if dirty is not None and not dirty:
+        return 0
+    pairs = load_playlist_pairs()
+    if np is None:
+        logger.warning('NumPy/SciPy не установлены, похожие аудиозаписи считаются медленным путём на Python')
+    compute = compute_similar_python if np is None else compute_similar_scipy
+    rows = compute(pairs, dirty, settings.SIMILAR_TITLES_COUNT) if pairs else iter(())
+    saved = save_similar(rows)
+    if full:
+        models.SimilarTitle.objects.exclude(title_id__in={title_id for _, title_id in pairs}).delete()
+        models.SimilarityDirty.objects.all().delete()
+    else:
+        models.SimilarTitle.objects.filter(title_id__in=dirty - {title_id for _, title_id in pairs}).delete()
+        models.SimilarityDirty.objects.filter(title_id__in=dirty).delete()
+    return saved
+
+
+def mark_dirty(title_ids):
+    models.SimilarityDirty.objects.bulk_create(
+        [models.SimilarityDirty(title_id=title_id) for title_id in title_ids],
+        ignore_conflicts=True,
+    )
+
+
+def mark_playlists_dirty(playlist_ids, title_ids=()):
+    """Отметка всех аудиозаписей плейлистов и title_ids: совместные вхождения меняются у каждой из них."""
+    members = models.Playlist.titles.through.objects.filter(playlist_id__in=playlist_ids).values_list(
+        'title_id', flat=True
+    )
+    mark_dirty({*members, *title_ids})
+
+
+def get_similar_titles(title, limit):
+    similar = models.SimilarTitle.objects.filter(
+        title=title, similar__private=False, similar__status=models.ProcessingStatus.READY
+    ).select_related('similar')
+    return [item.similar for item in similar.order_by('-score')[:limit]]
+
+
+def recommend_for_user(user, limit):
+    """Похожие на аудиозаписи из плейлистов и недавних прослушиваний пользователя, одним запросом."""
+    seeds = set(models.Playlist.titles.through.objects.filter(playlist__user=user).values_list('title_id', flat=True))
+    seeds.update(models.ListenEvent.objects.filter(user=user).order_by('-create_at').values_list(
+        'title_id', flat=True
+    )[:RECENT_LISTENS])
+    if not seeds:
+        return []
+    ranked = models.SimilarTitle.objects.filter(
+        title_id__in=seeds, similar__private=False, similar__status=models.ProcessingStatus.READY
+    ).exclude(similar_id__in=seeds).exclude(similar__user=user).values('similar_id').annotate(
+        relevance=Sum('score')
+    ).order_by('-relevance', 'similar_id')[:limit]
+    ids = [row['similar_id'] for row in ranked]
+    titles = models.Title.objects.filter(id__in=ids).prefetch_related('genre').in_bulk()
+    return [titles[title_id] for title_id in ids if title_id in titles]
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+CAS_PREFIX = 'cas/'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_blob_name(digest, extension):
+    """Имя файла по хешу содержимого, format: cas/ab/cd/{sha256}.{ext}"""
+    return f'{CAS_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище с адресацией по содержимому.
+
+    Имя файла — SHA-256 содержимого, поэтому одинаковые загрузки разделяют
+    один файл, а его URL никогда не меняется. Число ссылок на файл хранится
+    в модели Blob, файл удаляется вместе с последней ссылкой.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        directory = self.path(CAS_PREFIX)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as temporary:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks():
+                digest.update(chunk)
+                temporary.write(chunk)
+                size += len(chunk)
+        return self._store(temporary.name, digest.hexdigest(), os.path.splitext(name)[1], size)
+
+    def adopt(self, name):
+        """Перенос уже лежащего в хранилище файла под имя по его содержимому без копирования."""
+        if name.startswith(CAS_PREFIX):
+            return name
+        path = self.path(name)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return self._store(path, digest.hexdigest(), os.path.splitext(name)[1], os.path.getsize(path))
+
+    def _store(self, source_path, digest, extension, size):
+        name = get_blob_name(digest, extension)
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(source_path)
+        else:
+            os.replace(source_path, path)
+            if self.file_permissions_mode is not None:
+                os.chmod(path, self.file_permissions_mode)
+        self._add_reference(name, digest, size)
+        return name
+
+    def _add_reference(self, name, digest, size):
+        Blob = apps.get_model('sound', 'Blob')
+        if Blob.objects.filter(digest=digest).update(refcount=F('refcount') + 1):
+            return
+        try:
+            with transaction.atomic():
+                Blob.objects.create(digest=digest, name=name, size=size, refcount=1)
+        except IntegrityError:
+            Blob.objects.filter(digest=digest).update(refcount=F('refcount') + 1)
+
+    def delete(self, name):
+        """Снятие одной ссылки; файл удаляется, когда ссылок не осталось."""
+        if not name.startswith(CAS_PREFIX):
+            return super().delete(name)
+        Blob = apps.get_model('sound', 'Blob')
+        digest = os.path.splitext(os.path.basename(name))[0]
+        if Blob.objects.filter(digest=digest, refcount__lte=1).delete()[0]:
+            super().delete(name)
+        else:
+            Blob.objects.filter(digest=digest).update(refcount=F('refcount') - 1)
+
+
+content_addressed_storage = ContentAddressedStorage()
+# Не default_storage: иначе Django не пишет storage в миграции полей и их состояние
+# зависело бы от MEDIA_CONTENT_ADDRESSED.
+media_storage = FileSystemStorage()
+
+
+def get_media_storage():
+    """Хранилище загружаемых файлов, выбирается настройкой MEDIA_CONTENT_ADDRESSED."""
+    if settings.MEDIA_CONTENT_ADDRESSED:
+        return content_addressed_storage
+    return media_storage
@@ -0,0 +1,194 @@
+import base64
+import hashlib
+import math
+import os
+import re
+import time
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Запрошенный диапазон лежит за пределами файла."""
+
+
+class RangeFile:
+    """Файловый объект, ограниченный диапазоном байт.
+
+    Отдаёт наружу fileno() и tell(), поэтому wsgi.file_wrapper gunicorn
+    отправляет диапазон через os.sendfile, а без него read() не выходит за
+    конец диапазона.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def seekable(self):
+        return False
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Разбор заголовка Range, format: bytes=start-end | bytes=start- | bytes=-suffix.
+
+    Возвращает (start, end) включительно или None, если заголовок не задан,
+    составной или некорректен — тогда отдаётся весь файл.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+def get_file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def if_range_matches(request, etag, last_modified):
+    """Проверка If-Range: диапазон отдаётся, только если файл не изменился."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def get_content_disposition(filename):
+    return f"attachment; filename*=utf-8''{quote(filename)}"
+
+
+def accel_redirect_response(field_file, content_type, as_attachment=False):
+    """Передача отдачи файла nginx через внутренний location MEDIA_ACCEL_PREFIX."""
+    response = HttpResponse(content_type=content_type)
+    response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX + field_file.name)
+    if as_attachment:
+        response['Content-Disposition'] = get_content_disposition(os.path.basename(field_file.name))
+    return response
+
+
+def serve_media(request, field_file, content_type, as_attachment=False, offset=None):
+    """Отдача медиафайла с поддержкой Range, If-Range и условных заголовков.
+
+    При MEDIA_ACCEL_REDIRECT файл отдаёт nginx, иначе — сам Django.
+    offset задаёт начало отдачи в байтах вместо заголовка Range.
+    """
+    if settings.MEDIA_ACCEL_REDIRECT and offset is None:
+        return accel_redirect_response(field_file, content_type, as_attachment)
+
+    try:
+        stat = os.stat(field_file.path)
+    except FileNotFoundError:
+        raise Http404
+    size = stat.st_size
+    etag = get_file_etag(stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    try:
+        if offset is not None:
+            if offset >= size:
+                raise RangeNotSatisfiable
+            byte_range = (offset, size - 1)
+        elif if_range_matches(request, etag, last_modified):
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        else:
+            byte_range = None
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(field_file.path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    if as_attachment:
+        response['Content-Disposition'] = get_content_disposition(os.path.basename(field_file.name))
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def sign_stream_path(path, expires):
+    """Подпись в формате nginx secure_link_md5 "$secure_link_expires$uri <секрет>".
+
+    nginx проверяет только MD5 от строки с секретом, HMAC он не умеет;
+    path — раскодированный путь, как $uri в nginx.
+    """
+    digest = hashlib.md5(f'{expires}{path} {settings.STREAM_URL_SECRET}'.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def build_stream_url(name):
+    """Путь к файлу под STREAM_URL_PREFIX с подписью, действующей STREAM_URL_TTL секунд.
+
+    Срок округляется вверх до минуты, чтобы повторные запросы в пределах
+    минуты получали тот же URL и попадали в кеш плеера.
+    Возвращает (url, срок действия unix time).
+    """
+    expires = math.ceil((time.time() + settings.STREAM_URL_TTL) / 60) * 60
+    path = settings.STREAM_URL_PREFIX + name
+    query = urlencode({'md5': sign_stream_path(path, expires), 'expires': expires})
+    return f'{quote(path)}?{query}', expires
+
+
+def check_stream_signature(path, signature, expires):
+    """None для верной подписи, иначе код ответа, как у nginx: 403 — подпись неверна, 410 — срок истёк."""
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return 403
+    if not signature or not constant_time_compare(signature, sign_stream_path(path, expires)):
+        return 403
+    if expires < time.time():
+        return 410
+    return None
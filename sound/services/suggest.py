@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from sound import models
+
+logger = logging.getLogger(__name__)
+
+USER = 'user'
+TITLE = 'title'
+ALBUM = 'album'
+GENRE = 'genre'
+
+
+def get_keys(text):
+    """Ключи поиска: текст целиком и с начала каждого следующего слова."""
+    words = text.casefold().split()
+    return [' '.join(words[position:]) for position in range(len(words))]
+
+
+class PrefixIndex:
+    """Отсортированный массив ключей, поиск по префиксу бинарным поиском.
+
+    Элемент массива — (ключ, вид, id); по (вид, id) хранится исходный
+    текст, чтобы при переименовании удалить старые ключи.
+    """
+
+    def __init__(self, entries=()):
+        self.lock = threading.Lock()
+        self.texts = {}
+        self.keys = []
+        for kind, object_id, text in entries:
+            self.texts[(kind, object_id)] = text
+            self.keys.extend((key, kind, object_id) for key in get_keys(text))
+        self.keys.sort()
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, kind, object_id, text):
+        with self.lock:
+            self._remove(kind, object_id)
+            self.texts[(kind, object_id)] = text
+            for key in get_keys(text):
+                insort(self.keys, (key, kind, object_id))
+
+    def remove(self, kind, object_id):
+        with self.lock:
+            self._remove(kind, object_id)
+
+    def _remove(self, kind, object_id):
+        text = self.texts.pop((kind, object_id), None)
+        if text is None:
+            return
+        for key in get_keys(text):
+            position = bisect_left(self.keys, (key, kind, object_id))
+            if position < len(self.keys) and self.keys[position] == (key, kind, object_id):
+                del self.keys[position]
+
+    def search(self, prefix, limit):
+        """До limit разных объектов, ключ которых начинается с prefix."""
+        prefix = ' '.join(prefix.casefold().split())
+        results = []
+        seen = set()
+        position = bisect_left(self.keys, (prefix,))
+        while position < len(self.keys) and len(results) < limit:
+            key, kind, object_id = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            position += 1
+            if (kind, object_id) in seen:
+                continue
+            seen.add((kind, object_id))
+            text = self.texts.get((kind, object_id))
+            if text is not None:
+                results.append({'type': kind, 'id': object_id, 'text': text})
+        return results
+
+    def to_snapshot(self):
+        return [[kind, object_id, text] for (kind, object_id), text in self.texts.items()]
+
+
+def iter_catalog():
+    """Все объекты для подсказок: пользователи, жанры, публичные обработанные альбомы и аудиозаписи."""
+    for object_id, text in models.User.objects.values_list('id', 'username').iterator():
+        yield USER, object_id, text
+    for object_id, text in models.Genre.objects.values_list('id', 'name').iterator():
+        yield GENRE, object_id, text
+    for object_id, text in models.Album.objects.filter(private=False, status=models.ProcessingStatus.READY).values_list('id', 'name').iterator():
+        yield ALBUM, object_id, text
+    for object_id, text in models.Title.objects.filter(private=False, status=models.ProcessingStatus.READY).values_list('id', 'name').iterator():
+        yield TITLE, object_id, text
+
+
+def write_snapshot(path):
+    """Выгрузка подсказок из базы в файл; файл заменяется атомарно."""
+    entries = [list(entry) for entry in iter_catalog()]
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('w', dir=directory, delete=False, encoding='utf-8') as temporary:
+        json.dump(entries, temporary, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporary.name, path)
+    return len(entries)
+
+
+def read_snapshot(path):
+    with open(path, encoding='utf-8') as file:
+        return PrefixIndex((kind, object_id, text) for kind, object_id, text in json.load(file))
+
+
+class SuggestIndex:
+    """Индекс подсказок процесса.
+
+    Загружается из снимка SUGGEST_SNAPSHOT_PATH при первом запросе и
+    перечитывается, когда снимок обновился; между снимками изменения
+    моделей в этом процессе применяются сигналами.
+    """
+
+    def __init__(self):
+        self.index = None
+        self.snapshot_mtime = None
+        self.checked_at = 0
+        self.lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if self.index is None or now - self.checked_at >= settings.SUGGEST_RELOAD_INTERVAL:
+            with self.lock:
+                self.checked_at = now
+                self._reload()
+        return self.index
+
+    def _reload(self):
+        path = settings.SUGGEST_SNAPSHOT_PATH
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            if self.index is None:
+                logger.warning('Снимок подсказок %s не найден, индекс строится из базы', path)
+                self.index = PrefixIndex(iter_catalog())
+            return
+        if mtime != self.snapshot_mtime:
+            self.index = read_snapshot(path)
+            self.snapshot_mtime = mtime
+
+    def add(self, kind, object_id, text):
+        if self.index is not None:
+            self.index.add(kind, object_id, text)
+
+    def remove(self, kind, object_id):
+        if self.index is not None:
+            self.index.remove(kind, object_id)
+
+
+suggest_index = SuggestIndex()
+
+
+def suggest(prefix, limit):
+    return suggest_index.get().search(prefix, limit)
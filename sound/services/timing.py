@@ -0,0 +1,114 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger('sound.timing')
+
+current_timer = ContextVar('current_timer', default=None)
+SLOW_QUERIES_LOGGED = 10
+
+
+class RequestTimer:
+    """Замеры одного запроса: SQL запросы и время именованных участков.
+
+    Участок может начинаться внутри себя же (вложенные сериализаторы),
+    учитывается только внешний вход, чтобы время не считалось дважды.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.queries = []
+        self.sections = {}
+        self.open_sections = {}
+
+    def record_query(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper: длительность и текст каждого запроса."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started, sql))
+
+    def start(self, name):
+        depth = self.open_sections.get(name)
+        if depth is None:
+            self.open_sections[name] = [1, time.perf_counter()]
+        else:
+            depth[0] += 1
+
+    def stop(self, name):
+        depth = self.open_sections.get(name)
+        if depth is None:
+            return
+        depth[0] -= 1
+        if depth[0] == 0:
+            del self.open_sections[name]
+            self.sections[name] = self.sections.get(name, 0) + time.perf_counter() - depth[1]
+
+    @contextmanager
+    def section(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def finish(self):
+        for name in list(self.open_sections):
+            self.open_sections[name][0] = 1
+            self.stop(name)
+        self.total = time.perf_counter() - self.started
+
+    @property
+    def db_time(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def get_header(self):
+        """Значение Server-Timing, длительности в миллисекундах."""
+        metrics = [f'db;dur={self.db_time * 1000:.1f};desc="{len(self.queries)} queries"']
+        metrics.extend(f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.sections.items())
+        metrics.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def to_record(self):
+        """Замеры для лога медленных запросов: самые долгие SQL и число повторов каждого текста."""
+        repeats = {}
+        for _, sql in self.queries:
+            repeats[sql] = repeats.get(sql, 0) + 1
+        slowest = sorted(self.queries, key=lambda query: query[0], reverse=True)[:SLOW_QUERIES_LOGGED]
+        return {
+            'total_ms': round(self.total * 1000, 1),
+            'db_ms': round(self.db_time * 1000, 1),
+            'queries': len(self.queries),
+            **{f'{name}_ms': round(seconds * 1000, 1) for name, seconds in self.sections.items()},
+            'slowest_sql': [
+                {'ms': round(duration * 1000, 2), 'repeats': repeats[sql], 'sql': sql}
+                for duration, sql in slowest
+            ],
+        }
+
+
+@contextmanager
+def timed(name):
+    """Участок запроса для Server-Timing; без замера запроса ничего не делает."""
+    timer = current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.section(name):
+        yield
+
+
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+def log_slow_request(request, response, timer):
+    record = {'method': request.method, 'path': request.get_full_path(), 'status': response.status_code,
+              **timer.to_record()}
+    logger.warning(json.dumps(record, ensure_ascii=False))
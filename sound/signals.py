@@ -0,0 +1,359 @@
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import models
+from .services.cache import CATALOG_SCOPE, bump_versions, get_owner_scope, get_title_scopes
+from .services.charts import add_to_buckets
+from .services.counters import increment, recount_playlist_titles
+from .services.cleanup import delete_files_on_commit, flush_deletion_batch, start_deletion_batch
+from .services.feed import remove_author_from_feed, remove_title_from_feeds
+from .services.jobs import enqueue
+from .services.listens import flush_listens_if_due
+from .services.metrics import registry
+from .services.search import index_title, unindex_title
+from .services.similar import mark_playlists_dirty
+from .services.suggest import ALBUM, GENRE, TITLE, USER, suggest_index
+
+
+@receiver(pre_save, sender=models.Title)
+def remember_uploaded_file(sender, instance, **kwargs):
+    """Отметка о новом файле: после сохранения модели _committed уже True."""
+    instance._file_uploaded = bool(instance.file) and not instance.file._committed
+    if instance._file_uploaded:
+        instance.status = models.ProcessingStatus.PROCESSING
+
+
+@receiver(post_save, sender=models.Title)
+def process_uploaded_file(sender, instance, created, **kwargs):
+    """В лентах только READY записи: с заменой файла запись убирается из них до конца обработки."""
+    if getattr(instance, '_file_uploaded', False):
+        if not created:
+            remove_title_from_feeds(instance.id)
+        enqueue('process_title', title_id=instance.id)
+
+
+@receiver(pre_save, sender=models.Album)
+@receiver(pre_save, sender=models.Playlist)
+def remember_uploaded_cover(sender, instance, **kwargs):
+    instance._cover_uploaded = bool(instance.cover) and not instance.cover._committed
+    if instance._cover_uploaded:
+        instance.status = models.ProcessingStatus.PROCESSING
+
+
+@receiver(pre_save, sender=models.Title)
+@receiver(pre_save, sender=models.User)
+def remember_uploaded_image(sender, instance, **kwargs):
+    field = 'avatar' if sender is models.User else 'cover'
+    image = getattr(instance, field)
+    instance._image_uploaded = bool(image) and not image._committed
+
+
+@receiver(post_save, sender=models.Title)
+@receiver(post_save, sender=models.User)
+def process_uploaded_image(sender, instance, **kwargs):
+    if getattr(instance, '_image_uploaded', False):
+        enqueue(
+            'generate_thumbnails',
+            app_label=sender._meta.app_label,
+            model=sender._meta.model_name,
+            object_id=instance.id,
+            field='avatar' if sender is models.User else 'cover',
+        )
+
+
+@receiver(post_save, sender=models.Album)
+@receiver(post_save, sender=models.Playlist)
+def process_uploaded_cover(sender, instance, **kwargs):
+    if getattr(instance, '_cover_uploaded', False):
+        enqueue('process_cover', model=sender._meta.model_name, object_id=instance.id)
+
+
+@receiver(post_delete, sender=models.Title)
+def delete_title_files(sender, instance, **kwargs):
+    delete_files_on_commit(instance.file.name, instance.cover.name)
+
+
+@receiver(post_delete, sender=models.Album)
+@receiver(post_delete, sender=models.Playlist)
+def delete_cover_file(sender, instance, **kwargs):
+    """Срабатывает и при каскадном удалении вместе с пользователем."""
+    delete_files_on_commit(instance.cover.name)
+
+
+@receiver(post_delete, sender=models.User)
+def delete_avatar_file(sender, instance, **kwargs):
+    delete_files_on_commit(instance.avatar.name)
+
+
+@receiver(request_started)
+def start_request_deletions(sender, **kwargs):
+    start_deletion_batch()
+
+
+@receiver(request_finished)
+def flush_request_deletions(sender, **kwargs):
+    flush_deletion_batch()
+
+
+@receiver(request_finished)
+def flush_listens(sender, **kwargs):
+    """Буфер прослушиваний пишется после отдачи ответа, а не в самом запросе."""
+    flush_listens_if_due()
+
+
+@receiver(request_finished)
+def flush_metrics(sender, **kwargs):
+    registry.flush_if_due()
+
+
+@receiver(post_save, sender=models.Title)
+def update_title_search(sender, instance, **kwargs):
+    index_title(instance)
+
+
+@receiver(m2m_changed, sender=models.Title.genre.through)
+def update_title_genres_search(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        enqueue('reindex_titles', genre=instance.id)
+    else:
+        index_title(instance)
+
+
+@receiver(post_delete, sender=models.Title)
+def delete_title_search(sender, instance, **kwargs):
+    unindex_title(instance.id)
+
+
+SEARCH_RENAMES = {
+    models.Album: ('name', 'album'),
+    models.Genre: ('name', 'genre'),
+    models.User: ('username', 'user'),
+}
+
+
+@receiver(pre_save, sender=models.Album)
+@receiver(pre_save, sender=models.Genre)
+@receiver(pre_save, sender=models.User)
+def remember_search_rename(sender, instance, update_fields=None, **kwargs):
+    """Имена альбома, жанра и автора входят в поисковые документы его аудиозаписей."""
+    field, _ = SEARCH_RENAMES[sender]
+    instance._search_renamed = False
+    if instance.pk is None or (update_fields is not None and field not in update_fields):
+        return
+    old = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    instance._search_renamed = old is not None and old != getattr(instance, field)
+
+
+@receiver(post_save, sender=models.Album)
+@receiver(post_save, sender=models.Genre)
+@receiver(post_save, sender=models.User)
+def reindex_renamed(sender, instance, **kwargs):
+    if getattr(instance, '_search_renamed', False):
+        _, lookup = SEARCH_RENAMES[sender]
+        enqueue('reindex_titles', **{lookup: instance.pk})
+
+
+SUGGEST_FIELDS = {
+    models.User: (USER, 'username'),
+    models.Genre: (GENRE, 'name'),
+    models.Album: (ALBUM, 'name'),
+    models.Title: (TITLE, 'name'),
+}
+
+
+@receiver(post_save, sender=models.User)
+@receiver(post_save, sender=models.Genre)
+@receiver(post_save, sender=models.Album)
+@receiver(post_save, sender=models.Title)
+def update_suggest_index(sender, instance, **kwargs):
+    """Записи, ставшие READY в обработчике задач, попадают в подсказки со следующим снимком."""
+    kind, field = SUGGEST_FIELDS[sender]
+    hidden = getattr(instance, 'private', False)
+    hidden = hidden or getattr(instance, 'status', models.ProcessingStatus.READY) != models.ProcessingStatus.READY
+    if hidden:
+        suggest_index.remove(kind, instance.pk)
+    else:
+        suggest_index.add(kind, instance.pk, getattr(instance, field))
+
+
+@receiver(post_delete, sender=models.User)
+@receiver(post_delete, sender=models.Genre)
+@receiver(post_delete, sender=models.Album)
+@receiver(post_delete, sender=models.Title)
+def delete_from_suggest_index(sender, instance, **kwargs):
+    kind, _ = SUGGEST_FIELDS[sender]
+    suggest_index.remove(kind, instance.pk)
+
+
+@receiver(pre_save, sender=models.Title)
+def remember_privacy_change(sender, instance, **kwargs):
+    """Публичные записи рассылаются в ленты, ставшие приватными — убираются из них."""
+    old = sender.objects.filter(pk=instance.pk).values_list('private', flat=True).first() if instance.pk else None
+    instance._became_public = not instance.private and old is not False
+    instance._became_private = instance.private and old is False
+
+
+@receiver(post_save, sender=models.Title)
+def fan_out_to_feeds(sender, instance, **kwargs):
+    """Запись в обработке рассылает process_title_file после перехода в READY."""
+    if getattr(instance, '_became_public', False) and instance.status == models.ProcessingStatus.READY:
+        enqueue('fan_out_title', title_id=instance.id)
+    elif getattr(instance, '_became_private', False):
+        remove_title_from_feeds(instance.id)
+
+
+@receiver(post_save, sender=models.Follow)
+def backfill_new_subscription(sender, instance, created, **kwargs):
+    if created:
+        enqueue('backfill_feed', owner_id=instance.user_id, author_id=instance.subscriber_id)
+
+
+@receiver(post_delete, sender=models.Follow)
+def clear_cancelled_subscription(sender, instance, **kwargs):
+    remove_author_from_feed(instance.user_id, instance.subscriber_id)
+
+
+@receiver(m2m_changed, sender=models.Playlist.titles.through)
+def count_playlist_additions(sender, instance, action, reverse, pk_set, **kwargs):
+    """Добавление в плейлист учитывается в чартах как отметка «нравится»."""
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        add_to_buckets({instance.id: len(pk_set)}, 'likes')
+    else:
+        add_to_buckets(dict.fromkeys(pk_set, 1), 'likes')
+
+
+@receiver(m2m_changed, sender=models.Playlist.titles.through)
+def mark_similarity_dirty(sender, instance, action, reverse, pk_set, **kwargs):
+    """Все аудиозаписи изменившихся плейлистов пересчитываются build_similar_titles.
+
+    После удаления записи отмечаются отдельно: в плейлисте их уже нет.
+    """
+    if action in ('post_add', 'post_remove'):
+        if reverse:
+            mark_playlists_dirty(pk_set, [instance.id])
+        else:
+            mark_playlists_dirty([instance.id], pk_set)
+    elif action == 'pre_clear':
+        if reverse:
+            mark_playlists_dirty(instance.title_playlists.values_list('id', flat=True), [instance.id])
+        else:
+            mark_playlists_dirty([instance.id])
+
+
+@receiver(pre_delete, sender=models.Playlist)
+def mark_deleted_playlist_dirty(sender, instance, **kwargs):
+    mark_playlists_dirty([instance.id])
+
+
+@receiver(pre_delete, sender=models.Title)
+def mark_deleted_title_neighbours_dirty(sender, instance, **kwargs):
+    """Связи удаляемой аудиозаписи удаляются каскадом без m2m_changed."""
+    mark_playlists_dirty(instance.title_playlists.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=models.Album)
+@receiver(post_delete, sender=models.Album)
+@receiver(post_save, sender=models.Playlist)
+@receiver(post_delete, sender=models.Playlist)
+def bump_owner_version(sender, instance, **kwargs):
+    bump_versions(get_owner_scope(instance.user_id))
+
+
+@receiver(post_save, sender=models.Title)
+@receiver(pre_delete, sender=models.Title)
+def bump_title_versions(sender, instance, **kwargs):
+    bump_versions(*get_title_scopes([instance.id]))
+
+
+@receiver(post_save, sender=models.Genre)
+@receiver(post_delete, sender=models.Genre)
+def bump_catalog_version(sender, instance, **kwargs):
+    bump_versions(CATALOG_SCOPE)
+
+
+@receiver(m2m_changed, sender=models.Title.genre.through)
+def bump_title_genres_version(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        bump_versions(CATALOG_SCOPE)
+    else:
+        bump_versions(*get_title_scopes([instance.id]))
+
+
+@receiver(m2m_changed, sender=models.Playlist.titles.through)
+def bump_playlist_titles_version(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        bump_versions(*get_title_scopes([instance.id]))
+    else:
+        bump_versions(get_owner_scope(instance.user_id))
+
+
+@receiver(post_save, sender=models.Follow)
+def count_new_subscription(sender, instance, created, **kwargs):
+    """Счётчики подписок; заодно меняется updated_at, от которого зависит ETag с is_subscribed."""
+    if created:
+        increment(models.User, [instance.subscriber_id], 'followers_count', 1)
+        increment(models.User, [instance.user_id], 'following_count', 1)
+
+
+@receiver(post_delete, sender=models.Follow)
+def count_cancelled_subscription(sender, instance, **kwargs):
+    increment(models.User, [instance.subscriber_id], 'followers_count', -1)
+    increment(models.User, [instance.user_id], 'following_count', -1)
+
+
+@receiver(post_save, sender=models.Title)
+def count_new_title(sender, instance, created, **kwargs):
+    if created:
+        increment(models.User, [instance.user_id], 'titles_count', 1)
+
+
+@receiver(post_delete, sender=models.Title)
+def count_deleted_title(sender, instance, **kwargs):
+    increment(models.User, [instance.user_id], 'titles_count', -1)
+
+
+@receiver(post_save, sender=models.Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        increment(models.Title, [instance.title_id], 'comments_count', 1)
+
+
+@receiver(post_delete, sender=models.Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    increment(models.Title, [instance.title_id], 'comments_count', -1)
+
+
+@receiver(m2m_changed, sender=models.Playlist.titles.through)
+def count_playlist_titles(sender, instance, action, reverse, pk_set, **kwargs):
+    """Добавления прибавляются по pk_set — в нём только новые связи; после удаления счётчик пересчитывается."""
+    if action == 'post_add' and pk_set:
+        if reverse:
+            increment(models.Playlist, pk_set, 'titles_count', 1)
+        else:
+            increment(models.Playlist, [instance.id], 'titles_count', len(pk_set))
+    elif action == 'post_remove' and pk_set:
+        recount_playlist_titles(pk_set if reverse else [instance.id])
+    elif action == 'pre_clear' and reverse:
+        instance._playlist_ids = list(instance.title_playlists.values_list('id', flat=True))
+    elif action == 'post_clear':
+        recount_playlist_titles(instance.__dict__.pop('_playlist_ids', []) if reverse else [instance.id])
+
+
+@receiver(pre_delete, sender=models.Title)
+def remember_title_playlists(sender, instance, **kwargs):
+    """Связи с плейлистами удаляются каскадом без m2m_changed, плейлисты запоминаются заранее."""
+    instance._playlist_ids = list(instance.title_playlists.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=models.Title)
+def recount_title_playlists(sender, instance, **kwargs):
+    recount_playlist_titles(instance.__dict__.pop('_playlist_ids', []))
@@ -0,0 +1,490 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import DatabaseError
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient, APITestCase
+
+from oauth.models import CustomUser
+from sound import models, serializers
+from sound.services.images import get_thumbnail_name, prune_thumbnails
+from sound.services.jobs import claim_job, enqueue, register, run_job
+from sound.services.listens import ListenBuffer, listen_buffer
+from sound.services.media import UploadConflict, append_upload_chunk, expire_uploads
+from sound.services.playlists import STEP, add_titles, get_title_ids, move_titles, remove_titles
+from sound.services.storage import get_media_storage
+
+MP3_FRAME = b'\xff\xfb\x90\x64' + bytes(413)
+MP3 = b'ID3\x03' + bytes(6) + MP3_FRAME * 50
+
+
+def run_jobs():
+    while (job := claim_job()) is not None:
+        run_job(job)
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class SubscribeTests(APITestCase):
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        self.bob = CustomUser.objects.create_user('bob@example.com', 'bob')
+        self.client.force_authenticate(self.alice)
+
+    def test_subscribe(self):
+        response = self.client.post(f'/api/v1/users/{self.bob.id}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(models.Follow.objects.filter(user=self.alice, subscriber=self.bob).exists())
+
+    def test_subscribe_to_self(self):
+        response = self.client.post(f'/api/v1/users/{self.alice.id}/subscribe/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(models.Follow.objects.exists())
+
+    def test_subscribe_twice(self):
+        self.client.post(f'/api/v1/users/{self.bob.id}/subscribe/')
+        response = self.client.post(f'/api/v1/users/{self.bob.id}/subscribe/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(models.Follow.objects.count(), 1)
+
+
+class TitleVisibilityTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        self.bob = CustomUser.objects.create_user('bob@example.com', 'bob')
+        self.titles = {
+            status: models.Title.objects.create(user=self.alice, name=status, file=f'{status}.mp3', status=status)
+            for status in models.ProcessingStatus.values
+        }
+        self.url = f'/api/v1/users/{self.alice.id}/titles/'
+        self.addCleanup(listen_buffer.flush)
+
+    def get_names(self):
+        return sorted(title['name'] for title in self.client.get(self.url).data['results'])
+
+    def test_public_routes_show_ready_titles_only(self):
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.get_names(), ['ready'])
+        for status in (models.ProcessingStatus.PROCESSING, models.ProcessingStatus.FAILED):
+            title = self.titles[status]
+            self.assertEqual(self.client.get(f'{self.url}{title.id}/').status_code, 404)
+            self.assertEqual(self.client.get(f'{self.url}{title.id}/streaming_title/').status_code, 404)
+
+    def test_streaming_rejects_invalid_start_time(self):
+        self.client.force_authenticate(self.bob)
+        url = f'{self.url}{self.titles[models.ProcessingStatus.READY].id}/streaming_title/'
+        for value in ('nan', 'inf', '-inf', '-1', 'abc'):
+            self.assertEqual(self.client.get(url, {'t': value}).status_code, 400)
+
+    def test_owner_sees_all_titles(self):
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.get_names(), sorted(models.ProcessingStatus.values))
+
+    def test_search_finds_ready_titles_only(self):
+        response = self.client.get('/api/v1/search/', {'q': 'alice'})
+        self.assertEqual([title['name'] for title in response.data], ['ready'])
+
+
+class FeedFanOutTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        self.bob = CustomUser.objects.create_user('bob@example.com', 'bob')
+        models.Follow.objects.create(user=self.bob, subscriber=self.alice)
+        run_jobs()
+
+    def create_title(self, content):
+        return models.Title.objects.create(user=self.alice, name='song', file=ContentFile(content, name='song.mp3'))
+
+    def get_feed_title_ids(self):
+        return list(models.FeedItem.objects.filter(owner=self.bob).values_list('title_id', flat=True))
+
+    def test_title_is_fanned_out_when_ready(self):
+        title = self.create_title(MP3)
+        self.assertEqual(title.status, models.ProcessingStatus.PROCESSING)
+        self.assertFalse(models.MediaJob.objects.filter(kind='fan_out_title').exists())
+        run_jobs()
+        title.refresh_from_db()
+        self.assertEqual(title.status, models.ProcessingStatus.READY)
+        self.assertEqual(self.get_feed_title_ids(), [title.id])
+
+    def test_failed_title_is_not_fanned_out(self):
+        title = self.create_title(b'junk' * 1000)
+        run_jobs()
+        title.refresh_from_db()
+        self.assertEqual(title.status, models.ProcessingStatus.FAILED)
+        self.assertEqual(self.get_feed_title_ids(), [])
+
+    def test_replaced_file_leaves_feed_until_ready(self):
+        title = self.create_title(MP3)
+        run_jobs()
+        title.file = ContentFile(MP3, name='new.mp3')
+        title.save()
+        self.assertEqual(self.get_feed_title_ids(), [])
+        run_jobs()
+        self.assertEqual(self.get_feed_title_ids(), [title.id])
+
+    def test_feed_read_does_not_write(self):
+        title = self.create_title(MP3)
+        run_jobs()
+        client = APIClient()
+        client.force_authenticate(self.bob)
+        self.assertEqual([item['id'] for item in client.get('/api/v1/feed/').data['results']], [title.id])
+        with self.assertNumQueries(3):
+            client.get('/api/v1/feed/')
+
+
+class ChunkedUploadTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        self.client.force_authenticate(self.alice)
+
+    def upload(self, content):
+        response = self.client.post('/api/v1/uploads/', {'name': 'song', 'filename': 'song.mp3', 'length': len(content)})
+        url = f'/api/v1/uploads/{response.data["id"]}/'
+        self.client.patch(url, content, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='0')
+        response = self.client.post(f'{url}finish/')
+        self.assertEqual(response.status_code, 202)
+        run_jobs()
+        return models.Title.objects.get(id=response.data['id'])
+
+    def test_valid_upload_becomes_ready(self):
+        self.assertEqual(self.upload(MP3).status, models.ProcessingStatus.READY)
+
+    def test_upload_without_mp3_signature_fails(self):
+        self.assertEqual(self.upload(b'junk' * 100 + MP3_FRAME * 50).status, models.ProcessingStatus.FAILED)
+
+    def test_conflicting_chunk_does_not_overwrite_accepted_bytes(self):
+        response = self.client.post('/api/v1/uploads/', {'name': 'song', 'filename': 'song.mp3', 'length': 8})
+        upload = models.Upload.objects.get(id=response.data['id'])
+        stale = models.Upload.objects.get(id=upload.id)
+        self.assertEqual(append_upload_chunk(upload, io.BytesIO(b'aaaa'), 4), 4)
+        with self.assertRaises(UploadConflict):
+            append_upload_chunk(stale, io.BytesIO(b'bbbb'), 4)
+        with open(models.Title._meta.get_field('file').storage.path(upload.file_name), 'rb') as file:
+            self.assertEqual(file.read(), b'aaaa')
+
+    @override_settings(UPLOAD_MAX_OPEN=2)
+    def test_open_uploads_are_capped(self):
+        data = {'name': 'song', 'filename': 'song.mp3', 'length': 8}
+        for _ in range(2):
+            self.assertEqual(self.client.post('/api/v1/uploads/', data).status_code, 201)
+        self.assertEqual(self.client.post('/api/v1/uploads/', data).status_code, 400)
+        models.Upload.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(self.client.post('/api/v1/uploads/', data).status_code, 201)
+
+    def test_stale_uploads_expire(self):
+        data = {'name': 'song', 'filename': 'song.mp3', 'length': 8}
+        stale, fresh = (
+            models.Upload.objects.get(id=self.client.post('/api/v1/uploads/', data).data['id']) for _ in range(2)
+        )
+        models.Upload.objects.filter(id=stale.id).update(updated_at=timezone.now() - timedelta(days=2))
+        storage = models.Title._meta.get_field('file').storage
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_uploads(), 1)
+        run_jobs()
+        self.assertEqual(list(models.Upload.objects.values_list('id', flat=True)), [fresh.id])
+        self.assertFalse(storage.exists(stale.file_name))
+        self.assertTrue(storage.exists(fresh.file_name))
+
+
+class ListenBufferTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_flush_skips_deleted_titles(self):
+        alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        kept, deleted = (
+            models.Title.objects.create(user=alice, name=name, file=f'{name}.mp3') for name in ('kept', 'deleted')
+        )
+        buffer = ListenBuffer()
+        buffer.record(alice.id, kept.id)
+        buffer.record(alice.id, deleted.id)
+        deleted.delete()
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(list(models.ListenEvent.objects.values_list('title_id', flat=True)), [kept.id])
+        kept.refresh_from_db()
+        self.assertEqual(kept.play_count, 1)
+
+    def test_flush_refreshes_cached_title_list(self):
+        alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        title = models.Title.objects.create(user=alice, name='song', file='song.mp3')
+        url = f'/api/v1/users/{alice.id}/titles/'
+        self.assertEqual(self.client.get(url).data['results'][0]['play_count'], 0)
+        buffer = ListenBuffer()
+        buffer.record(alice.id, title.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            buffer.flush()
+        self.assertEqual(self.client.get(url).data['results'][0]['play_count'], 1)
+
+
+    @override_settings(LISTEN_FLUSH_MAX_ATTEMPTS=2, LISTEN_BUFFER_MAX=3)
+    def test_failed_flush_is_bounded(self):
+        alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        titles = [
+            models.Title.objects.create(user=alice, name=str(number), file=f'{number}.mp3') for number in range(4)
+        ]
+        buffer = ListenBuffer()
+        failing = mock.patch.object(models.ListenEvent.objects, 'bulk_create', side_effect=DatabaseError)
+        with failing, self.assertLogs('sound.services.listens', 'ERROR'):
+            for title in titles:
+                buffer.record(alice.id, title.id)
+            self.assertEqual(buffer.flush(), 0)
+            self.assertEqual([event.title_id for event in buffer.events], [title.id for title in titles[1:]])
+            self.assertEqual(buffer.flush(), 0)
+            self.assertEqual(buffer.events, [])
+        buffer.record(None, titles[0].id)
+        self.assertEqual(buffer.flush(), 1)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        self.title = models.Title.objects.create(user=self.alice, name='song', file='song.mp3')
+        self.url = f'/api/v1/users/{self.alice.id}/titles/{self.title.id}/'
+
+    def test_title_detail_revalidates_nested_genres(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.title.genre.add(models.Genre.objects.create(name='jazz'))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['genres']), 1)
+
+    def test_title_detail_is_cached(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with mock.patch.object(serializers.TitleSerializer, 'to_representation') as to_representation:
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['name'], 'song')
+        to_representation.assert_not_called()
+
+
+@override_settings(STREAM_URL_SECRET='secret')
+class SignedStreamTests(MediaRootMixin, APITestCase):
+    def test_hls_segments_use_signed_urls(self):
+        alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        title = models.Title.objects.create(user=alice, name='song', file=ContentFile(MP3, name='song.mp3'))
+        run_jobs()
+        self.client.force_authenticate(alice)
+        response = self.client.get(f'/api/v1/users/{alice.id}/titles/{title.id}/hls/')
+        self.addCleanup(listen_buffer.flush)
+        segments = [line for line in response.content.decode().splitlines() if not line.startswith('#')]
+        self.assertTrue(segments)
+        for url in segments:
+            self.assertTrue(url.startswith('/stream/'))
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(self.client.get(url.replace('md5=', 'md5=x')).status_code, 403)
+
+
+class SimilarityDirtyTests(TestCase):
+    def setUp(self):
+        alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        self.titles = [
+            models.Title.objects.create(user=alice, name=str(number), file=f'{number}.mp3') for number in range(4)
+        ]
+        self.playlist = models.Playlist.objects.create(user=alice, name='mix')
+        add_titles(self.playlist, [title.id for title in self.titles[:2]])
+        models.SimilarityDirty.objects.all().delete()
+
+    def get_dirty(self):
+        return set(models.SimilarityDirty.objects.values_list('title_id', flat=True))
+
+    def test_add_marks_existing_members(self):
+        add_titles(self.playlist, [self.titles[2].id])
+        self.assertEqual(self.get_dirty(), {title.id for title in self.titles[:3]})
+
+    def test_remove_marks_remaining_members(self):
+        remove_titles(self.playlist, [self.titles[0].id])
+        self.assertEqual(self.get_dirty(), {title.id for title in self.titles[:2]})
+
+    def test_reverse_add_marks_playlist_members(self):
+        self.titles[3].title_playlists.add(self.playlist, through_defaults={'position': 1 << 40})
+        self.assertEqual(self.get_dirty(), {self.titles[0].id, self.titles[1].id, self.titles[3].id})
+
+
+@register('test_reclaimed')
+def reclaim_job(job_id):
+    models.MediaJob.objects.filter(id=job_id).update(attempts=F('attempts') + 1)
+
+
+class MediaJobTests(TestCase):
+    def test_reclaimed_job_keeps_new_claim(self):
+        job = enqueue('test_reclaimed', job_id=None)
+        job.payload = {'job_id': job.id}
+        job.save()
+        run_job(claim_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, models.MediaJob.RUNNING)
+        self.assertEqual(job.attempts, 2)
+
+
+class ThumbnailTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = get_media_storage()
+
+    def save_image(self, name, size):
+        content = io.BytesIO()
+        Image.new('RGB', size).save(content, 'PNG')
+        return self.storage.save(name, ContentFile(content.getvalue()))
+
+    def test_prune_evicts_least_recently_accessed(self):
+        paths = []
+        for name in ('hot', 'cold'):
+            path = self.storage.path(get_thumbnail_name(f'{name}.png', 64, 'webp'))
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as file:
+                file.write(bytes(100))
+            paths.append(path)
+        hot, cold = paths
+        os.utime(hot, (3000, 1000))
+        os.utime(cold, (2000, 2000))
+        with mock.patch('sound.services.images.is_atime_tracked', return_value=True):
+            self.assertEqual(prune_thumbnails(self.storage, 150), (1, 100))
+        self.assertTrue(os.path.exists(hot))
+        self.assertFalse(os.path.exists(cold))
+
+    def test_decompression_bomb_is_not_found(self):
+        name = self.save_image('covers/bomb.png', (100, 100))
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+            response = self.client.get(f'/media/thumbs/{name}/64.webp')
+        self.assertEqual(response.status_code, 404)
+
+
+class MetricsTests(APITestCase):
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_metrics_are_hidden_without_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_require_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+
+class PlaylistPositionTests(TestCase):
+    def setUp(self):
+        alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        self.ids = [
+            models.Title.objects.create(user=alice, name=str(number), file=f'{number}.mp3').id for number in range(4)
+        ]
+        self.playlist = models.Playlist.objects.create(user=alice, name='mix')
+
+    def get_positions(self):
+        return dict(models.PlaylistTitle.objects.filter(playlist=self.playlist).values_list('title_id', 'position'))
+
+    def test_add_appends_with_step(self):
+        self.assertEqual(add_titles(self.playlist, self.ids[:3] + self.ids[:1]), self.ids[:3])
+        self.assertEqual(get_title_ids(self.playlist), self.ids[:3])
+        self.assertEqual(sorted(self.get_positions().values()), [STEP, 2 * STEP, 3 * STEP])
+        self.assertEqual(add_titles(self.playlist, self.ids[:2]), [])
+
+    def test_add_at_head_goes_below_first_position(self):
+        add_titles(self.playlist, self.ids[:2])
+        add_titles(self.playlist, self.ids[2:3], after=None)
+        add_titles(self.playlist, self.ids[3:], after=None)
+        self.assertEqual(get_title_ids(self.playlist), [self.ids[3], self.ids[2], self.ids[0], self.ids[1]])
+        self.assertEqual(self.get_positions()[self.ids[3]], -STEP)
+
+    def test_add_after_fills_gap(self):
+        add_titles(self.playlist, self.ids[:2])
+        add_titles(self.playlist, self.ids[2:], after=self.ids[0])
+        self.assertEqual(get_title_ids(self.playlist), [self.ids[0], self.ids[2], self.ids[3], self.ids[1]])
+        positions = self.get_positions()
+        self.assertEqual((positions[self.ids[0]], positions[self.ids[1]]), (STEP, 2 * STEP))
+        self.assertTrue(STEP < positions[self.ids[2]] < positions[self.ids[3]] < 2 * STEP)
+
+    def test_collision_renumbers(self):
+        add_titles(self.playlist, self.ids[:2])
+        models.PlaylistTitle.objects.filter(title_id=self.ids[1]).update(position=STEP + 1)
+        add_titles(self.playlist, self.ids[2:3], after=self.ids[0])
+        self.assertEqual(get_title_ids(self.playlist), [self.ids[0], self.ids[2], self.ids[1]])
+        positions = self.get_positions()
+        self.assertEqual((positions[self.ids[0]], positions[self.ids[1]]), (STEP, 2 * STEP))
+
+    def test_move_ignores_moved_titles_as_neighbours(self):
+        add_titles(self.playlist, self.ids)
+        self.assertEqual(move_titles(self.playlist, [self.ids[1], self.ids[0]], after=self.ids[2]), self.ids[1::-1])
+        self.assertEqual(get_title_ids(self.playlist), [self.ids[2], self.ids[1], self.ids[0], self.ids[3]])
+        move_titles(self.playlist, [self.ids[3]], after=None)
+        self.assertEqual(get_title_ids(self.playlist), [self.ids[3], self.ids[2], self.ids[1], self.ids[0]])
+        move_titles(self.playlist, [self.ids[3], self.ids[2]])
+        self.assertEqual(get_title_ids(self.playlist), [self.ids[1], self.ids[0], self.ids[3], self.ids[2]])
+
+    def test_remove_keeps_order(self):
+        add_titles(self.playlist, self.ids)
+        self.assertEqual(remove_titles(self.playlist, [self.ids[1], 999]), {self.ids[1]})
+        self.assertEqual(get_title_ids(self.playlist), [self.ids[0], self.ids[2], self.ids[3]])
+        add_titles(self.playlist, self.ids[1:2], after=self.ids[0])
+        self.assertEqual(get_title_ids(self.playlist), self.ids)
+
+
+class PlaylistTitlesApiTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = CustomUser.objects.create_user('alice@example.com', 'alice')
+        self.bob = CustomUser.objects.create_user('bob@example.com', 'bob')
+        self.ids = [
+            models.Title.objects.create(user=self.alice, name=str(number), file=f'{number}.mp3').id
+            for number in range(3)
+        ]
+        self.private_id = models.Title.objects.create(user=self.bob, name='private', file='p.mp3', private=True).id
+        self.playlist = models.Playlist.objects.create(user=self.alice, name='mix')
+        self.url = f'/api/v1/users/{self.alice.id}/playlist/{self.playlist.id}/titles/'
+
+    def test_owner_changes_titles(self):
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(self.url, {'titles': self.ids[1:]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['titles'], self.ids[1:])
+        response = self.client.post(self.url, {'titles': self.ids[:1], 'after': None}, format='json')
+        self.assertEqual(response.data['titles'], self.ids)
+        response = self.client.post(f'{self.url}move/', {'titles': self.ids[:1], 'after': self.ids[2]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['titles'], self.ids[1:] + self.ids[:1])
+        response = self.client.delete(self.url, {'titles': self.ids[1:2]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['titles'], [self.ids[2], self.ids[0]])
+
+    def test_invalid_requests_are_rejected(self):
+        self.client.force_authenticate(self.alice)
+        self.client.post(self.url, {'titles': self.ids[:1]}, format='json')
+        for data in (
+            {'titles': []},
+            {'titles': self.ids[1:], 'after': self.ids[2]},
+            {'titles': self.ids[1:2], 'after': self.ids[2]},
+            {'titles': [self.private_id]},
+        ):
+            self.assertEqual(self.client.post(self.url, data, format='json').status_code, 400)
+        self.assertEqual(get_title_ids(self.playlist), self.ids[:1])
+
+    def test_only_owner_changes_titles(self):
+        data = {'titles': self.ids[:1]}
+        self.assertEqual(self.client.post(self.url, data, format='json').status_code, 401)
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.post(self.url, data, format='json').status_code, 403)
+        self.assertEqual(self.client.post(f'{self.url}move/', data, format='json').status_code, 403)
+        self.assertEqual(self.client.delete(self.url, data, format='json').status_code, 403)
+        self.assertEqual(get_title_ids(self.playlist), [])
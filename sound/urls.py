@@ -10,6 +10,10 @@ router.register(r'users', views.UserView, basename='users_api_v1')
 router.register(r'users/(?P<user_id>\d+)/albums', views.AlbumView, basename='albums_api_v1')
 router.register(r'users/(?P<user_id>\d+)/playlist', views.PlaylistView, basename='playlist_api_v1')
 router.register(r'users/(?P<user_id>\d+)/titles', views.TitleView, basename='titles_api_v1')
+router.register(r'uploads', views.UploadView, basename='uploads_api_v1')
+router.register(r'feed', views.FeedView, basename='feed_api_v1')
+router.register(r'search', views.SearchView, basename='search_api_v1')
+router.register(r'suggest', views.SuggestView, basename='suggest_api_v1')
 router.register(r'users/(?P<user_id>\d+)/titles/(?P<title_id>\d+)/comments',
                 views.CommentView, basename='comments_api_v1')
 
@@ -1,32 +1,156 @@
-import os
-from urllib import response
+import math
 
-from django.http import Http404, HttpResponse, FileResponse
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch, Value
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import parsers, status, viewsets
+from PIL import Image
+from django.conf import settings
+from rest_framework import mixins, parsers, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import UnsupportedMediaType, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from . import models, serializers
 from .pagination import Pagination
 from .permissions import IsAuthorOrAdminOrReadOnly, IsOwnerOrAdminOrReadOnly
-from .services.services import delete_old_file
+from .services.cache import (CATALOG_SCOPE, get_or_compute, get_owner_scope, get_response_key, get_versions,
+                             make_etag)
+from .services.charts import WINDOWS as CHART_WINDOWS
+from .services.feed import pull_feed
+from .services.images import THUMBNAIL_ROOT, get_thumbnail, parse_thumbnail_name
+from .services.listens import record_listen
+from .services.media import (UploadConflict, append_upload_chunk, build_hls_playlist, cancel_upload,
+                             finish_upload, get_seek_position)
+from .services.metrics import (CONTENT_TYPE as METRICS_CONTENT_TYPE, UPLOAD_DURATION, UPLOAD_SIZE, registry,
+                               render_metrics)
+from .services.playlists import END, add_titles, get_title_ids, move_titles, remove_titles
+from .services.search import search_titles
+from .services.similar import get_similar_titles, recommend_for_user
+from .services.storage import get_media_storage
+from .services.suggest import suggest
+from .services.streaming import build_stream_url, check_stream_signature, serve_media
+
+
+class AcceptedCreateMixin:
+    """Ответ 202 на создание, пока загруженные файлы обрабатываются в фоне."""
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        if response.data.get('status') == models.ProcessingStatus.PROCESSING:
+            response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для list и retrieve; при совпадении — 304 без сериализации.
+
+    Валидатор списка — число строк и max(updated_at) выборки одним запросом,
+    объекта — его updated_at. В него же входят строка запроса, пользователь и
+    версии кеша, которые меняются и при изменении вложенных данных.
+    Last-Modified у списка не ставится: по нему не видно удаления строк;
+    у объекта — только если вложенные данные не меняются без его updated_at.
+    """
+    detail_last_modified = True
+
+    def get_validator_parts(self):
+        parts = [self.request.get_full_path(), self.request.user.id]
+        if hasattr(self, 'get_cache_scopes'):
+            parts.extend(get_versions(self.get_cache_scopes()))
+        return parts
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        stats = queryset.aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+        etag = make_etag(self.get_validator_parts() + [stats['count'], stats['last_modified']])
+        return self.get_conditional_response(request, etag, None, super().list, *args, **kwargs)
+
+    def get_object(self):
+        # Объект для валидатора retrieve не запрашивается повторно при сериализации.
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = make_etag(self.get_validator_parts() + [instance.pk, instance.updated_at])
+        last_modified = int(instance.updated_at.timestamp()) if self.detail_last_modified else None
+        return self.get_conditional_response(request, etag, last_modified, super().retrieve, *args, **kwargs)
+
+    def get_conditional_response(self, request, etag, last_modified, view, *args, **kwargs):
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CachedResponseMixin:
+    """Кеш ответов list и retrieve по версиям данных каталога и владельца маршрута.
+
+    Ключ — маршрут, строка запроса и класс видимости (владелец или все
+    остальные); версии меняют сигналы при изменении моделей.
+    """
+
+    def is_owner_route(self):
+        user = self.request.user
+        return user.is_authenticated and str(user.id) == str(self.kwargs.get('user_id'))
+
+    def get_cache_scopes(self):
+        scopes = [CATALOG_SCOPE]
+        if 'user_id' in self.kwargs:
+            scopes.append(get_owner_scope(self.kwargs['user_id']))
+        return scopes
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, view, request, *args, **kwargs):
+        key = get_response_key(
+            f'{self.basename}-{self.action}',
+            get_versions(self.get_cache_scopes()),
+            'owner' if self.is_owner_route() else 'public',
+            request.get_full_path(),
+        )
+        data = get_or_compute(key, lambda: view(request, *args, **kwargs).data, settings.RESPONSE_CACHE_TIMEOUT)
+        return Response(data)
 
 
-class UserView(viewsets.ModelViewSet):
+class UserView(ConditionalGetMixin, viewsets.ModelViewSet):
     """Просмотр и редактирование данных пользователя."""
     queryset = models.User.objects.all()
     serializer_class = serializers.UserSerializer
     pagination_class = Pagination
+    ordering = 'id'
     parser_classes = (parsers.MultiPartParser,)
     permission_classes = (IsOwnerOrAdminOrReadOnly,)
 
-    @action(detail=True, permission_classes=[IsAuthenticated])
-    def subscribe(self, request, id=None):
+    def get_queryset(self):
+        return self.queryset.annotate(is_subscribed=self._is_subscribed_expression('pk'))
+
+    def _is_subscribed_expression(self, subscriber_ref):
+        """Подзапрос подписки текущего пользователя, чтобы не делать запрос на каждую строку."""
+        user = self.request.user
+        if user.is_anonymous:
+            return Value(False)
+        return Exists(models.Follow.objects.filter(user=user, subscriber=OuterRef(subscriber_ref)))
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def subscribe(self, request, pk=None):
         user = request.user
-        subscriber = get_object_or_404(models.User, id=id)
+        subscriber = get_object_or_404(models.User, id=pk)
 
         data = {
             'user': user.id,
@@ -41,9 +165,9 @@ class UserView(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @subscribe.mapping.delete
-    def delete_subscribe(self, request, id=None):
+    def delete_subscribe(self, request, pk=None):
         user = request.user
-        subscriber = get_object_or_404(models.User, id=id)
+        subscriber = get_object_or_404(models.User, id=pk)
         subscribe = get_object_or_404(
             models.Follow, user=user, subscriber=subscriber
         )
@@ -51,10 +175,19 @@ class UserView(viewsets.ModelViewSet):
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def for_you(self, request):
+        """Рекомендации по плейлистам и недавним прослушиваниям пользователя."""
+        titles = recommend_for_user(request.user, settings.SIMILAR_TITLES_COUNT)
+        serializer = serializers.TitleSerializer(titles, many=True, context={'request': request})
+        return Response(serializer.data)
+
     @action(detail=False, permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
         user = request.user
-        queryset = models.Follow.objects.filter(user=user)
+        queryset = models.Follow.objects.filter(user=user).select_related('subscriber').annotate(
+            is_subscribed=self._is_subscribed_expression('subscriber_id')
+        )
         pages = self.paginate_queryset(queryset)
         serializer = serializers.FollowerSerializer(
             pages,
@@ -64,113 +197,422 @@ class UserView(viewsets.ModelViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class GenreView(viewsets.ReadOnlyModelViewSet):
+class GenreView(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """Список жанров."""
     queryset = models.Genre.objects.all()
     serializer_class = serializers.GenreSerializer
-
-
-class AlbumView(viewsets.ModelViewSet):
+    pagination_class = Pagination
+    ordering = 'name'
+
+    @action(detail=False)
+    def trending(self, request):
+        """Общий чарт окна ?window=24h|7d|30d."""
+        return self.get_chart_response(request, None)
+
+    @action(detail=True, url_path='trending')
+    def genre_trending(self, request, pk=None):
+        genre = self.get_object()
+        return self.get_chart_response(request, genre.id)
+
+    def get_chart_response(self, request, genre_id):
+        window = request.query_params.get('window', '24h')
+        if window not in CHART_WINDOWS:
+            raise ValidationError({'window': f'Допустимые окна: {", ".join(CHART_WINDOWS)}.'})
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), settings.CHART_SIZE)
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+
+        def get_data():
+            entries = models.ChartEntry.objects.filter(
+                window=window, genre_id=genre_id, position__lte=limit
+            ).order_by('position').select_related('title').prefetch_related('title__genre')
+            return serializers.ChartEntrySerializer(entries, many=True, context={'request': request}).data
+
+        data = cache.get_or_set(f'chart:{window}:{genre_id}:{limit}', get_data, settings.CHART_CACHE_TIMEOUT)
+        return Response(data)
+
+
+class AlbumView(AcceptedCreateMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """CRUD альбомов автора."""
     parser_classes = (parsers.MultiPartParser,)
     serializer_class = serializers.AlbumSerializer
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
+    pagination_class = Pagination
+    ordering = '-id'
 
     def get_queryset(self):
-        user  = self.request.user
-        author_id = self.kwargs.get('user_id')
-        if user.id == author_id:
-            return models.Album.objects.filter(user=user)
-        return models.Album.objects.filter(user__id=author_id, private=False)
+        if self.is_owner_route():
+            return models.Album.objects.filter(user=self.request.user)
+        return models.Album.objects.filter(
+            user__id=self.kwargs.get('user_id'), private=False, status=models.ProcessingStatus.READY
+        )
 
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-    def perform_destroy(self, instance):
-        delete_old_file(instance.cover.path)
-        instance.delete()
-
 
-class TitleView(viewsets.ModelViewSet):
+class TitleView(AcceptedCreateMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """CRUD аудиозаписей."""
     parser_classes = (parsers.MultiPartParser,)
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
     serializer_class = serializers.TitleSerializer
+    pagination_class = Pagination
+    ordering = ('-create_at', '-id')
     filter_backends = (DjangoFilterBackend,)
     filterset_fields =('name', 'user__username', 'album__name', 'genre__name')
+    # Жанры меняются без updated_at аудиозаписи, их видно только по ETag.
+    detail_last_modified = False
 
     def get_queryset(self):
-        user  = self.request.user
-        author_id = self.kwargs.get('user_id')
-        if user.id == author_id:
-            return models.Title.objects.filter(user=user)
-        return models.Title.objects.filter(user__id=author_id, private=False)
+        if self.is_owner_route():
+            queryset = models.Title.objects.filter(user=self.request.user)
+        else:
+            queryset = models.Title.objects.filter(
+                user__id=self.kwargs.get('user_id'), private=False, status=models.ProcessingStatus.READY
+            )
+        return queryset.prefetch_related('genre')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-    def perform_destroy(self, instance):
-        delete_old_file(instance.cover.path)
-        delete_old_file(instance.file.path)
-        instance.delete()
-
     @action(detail=True, permission_classes=[IsAuthenticated])
     def streaming_title(self, request, user_id, pk=None):
-        user = request.user
-        author_id = user_id
-        if user.id == author_id:
-            self.title = get_object_or_404(models.Title, id=pk)
-        self.title = get_object_or_404(models.Title, id=pk, private=False)
-
-        if os.path.exists(self.title.file.path):
-            response = HttpResponse('', content_type="audio/mpeg", status=206)
-            response['X-Accel-Redirect'] = self.title.file.path
-            return response
-        else:
-            return Http404
+        title = self.get_object()
+        if request.META.get('HTTP_RANGE', 'bytes=0-').startswith('bytes=0-'):
+            record_listen(request.user, title)
+        seconds = request.query_params.get('t')
+        if seconds is None:
+            return serve_media(request, title.file, 'audio/mpeg')
+
+        try:
+            seconds = float(seconds)
+        except ValueError:
+            seconds = math.nan
+        if not math.isfinite(seconds) or seconds < 0:
+            raise ValidationError({'t': 'Время начала должно быть неотрицательным числом секунд.'})
+        position = get_seek_position(title, seconds)
+        if position is None:
+            return serve_media(request, title.file, 'audio/mpeg')
+        offset, start_time = position
+        response = serve_media(request, title.file, 'audio/mpeg', offset=offset)
+        response['X-Seek-Time'] = f'{start_time:.3f}'
+        return response
+
+    @action(detail=True, permission_classes=[IsAuthenticated])
+    def stream_url(self, request, user_id, pk=None):
+        """Подписанная ссылка на файл: дальнейшие Range запросы плеера nginx отдаёт без Django.
+
+        Без STREAM_URL_SECRET возвращается ссылка на streaming_title.
+        """
+        title = self.get_object()
+        if not settings.STREAM_URL_SECRET:
+            url = self.reverse_action('streaming-title', kwargs={'user_id': user_id, 'pk': title.pk})
+            return Response({'url': url, 'expires': None})
+        record_listen(request.user, title)
+        url, expires = build_stream_url(title.file.name)
+        return Response(
+            {'url': request.build_absolute_uri(url), 'expires': expires},
+            headers={'Cache-Control': 'private, no-store'},
+        )
 
     @action(detail=True, permission_classes=[IsAuthenticated])
     def download_title(self, request, user_id, pk=None):
-        user = request.user
-        author_id = user_id
-        if user.id == author_id:
-            self.title = get_object_or_404(models.Title, id=pk)
-        self.title = get_object_or_404(models.Title, id=pk, private=False)
-
-        if os.path.exists(self.title.file.path):
-            response = HttpResponse('', content_type="audio/mpeg", status=206)
-            response["Content-Disposition"] = f"attachment; filename={self.title.file.name.split('/')[-1]}"
-            response['X-Accel-Redirect'] = self.title.file.path
-            return response
-        else:
-            return Http404
+        title = self.get_object()
+        return serve_media(request, title.file, 'audio/mpeg', as_attachment=True)
 
+    @action(detail=True)
+    def similar(self, request, user_id, pk=None):
+        title = self.get_object()
+        titles = get_similar_titles(title, settings.SIMILAR_TITLES_COUNT)
+        serializer = self.get_serializer(titles, many=True)
+        return Response(serializer.data)
 
-class PlaylistView(viewsets.ModelViewSet):
+    @action(detail=True, permission_classes=[IsAuthenticated])
+    def hls(self, request, user_id, pk=None):
+        title = self.get_object()
+        seek_index = models.SeekIndex.objects.filter(title=title, segment_frames__gt=0).first()
+        if seek_index is None:
+            raise Http404
+        record_listen(request.user, title)
+        return HttpResponse(build_hls_playlist(title, seek_index), content_type='application/vnd.apple.mpegurl')
+
+
+class PlaylistView(AcceptedCreateMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """CRUD плейлистов пользователя."""
     serializer_class = serializers.PlaylistSerializer
     parser_classes = (parsers.MultiPartParser,)
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
+    pagination_class = Pagination
+    ordering = '-id'
+    # Вложенные аудиозаписи меняются без updated_at плейлиста, их видно только по ETag.
+    detail_last_modified = False
 
     def get_queryset(self):
-        user  = self.request.user
-        author_id = self.kwargs.get('user_id')
-        if user.id == author_id:
-            return models.Playlist.objects.filter(user=user)
-        return models.Playlist.objects.filter(user__id=author_id, private=False)
+        if self.is_owner_route():
+            queryset = models.Playlist.objects.filter(user=self.request.user)
+        else:
+            queryset = models.Playlist.objects.filter(
+                user__id=self.kwargs.get('user_id'), private=False, status=models.ProcessingStatus.READY
+            )
+        queryset = queryset.select_related('user')
+        if self.action in ('list', 'retrieve'):
+            entries = models.PlaylistTitle.objects.order_by('position', 'id').select_related(
+                'title'
+            ).prefetch_related('title__genre')
+            if not self.is_owner_route():
+                entries = entries.filter(title__status=models.ProcessingStatus.READY)
+            queryset = queryset.prefetch_related(Prefetch('entries', queryset=entries))
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-    def perform_destroy(self, instance):
-        delete_old_file(instance.cover.path)
-        instance.delete()
+    def change_titles(self, request, serializer_class, change):
+        playlist = self.get_object()
+        serializer = serializer_class(data=request.data, context={'request': request, 'playlist': playlist})
+        serializer.is_valid(raise_exception=True)
+        change(playlist, serializer.validated_data)
+        return Response({'titles': get_title_ids(playlist)})
+
+    @action(detail=True, methods=['post'], parser_classes=(parsers.JSONParser,))
+    def titles(self, request, user_id, pk=None):
+        """Добавление аудиозаписей подряд после `after` или в конец, одной вставкой."""
+        return self.change_titles(request, serializers.PlaylistAddTitlesSerializer, lambda playlist, data: add_titles(
+            playlist, data['titles'], data.get('after', END)
+        ))
+
+    @titles.mapping.delete
+    def delete_titles(self, request, user_id, pk=None):
+        return self.change_titles(request, serializers.PlaylistTitlesSerializer, lambda playlist, data: remove_titles(
+            playlist, data['titles']
+        ))
+
+    @action(detail=True, methods=['post'], url_path='titles/move', parser_classes=(parsers.JSONParser,))
+    def move(self, request, user_id, pk=None):
+        """Перенос аудиозаписей подряд после `after`: null — в начало, без него — в конец."""
+        return self.change_titles(request, serializers.PlaylistTitlesSerializer, lambda playlist, data: move_titles(
+            playlist, data['titles'], data.get('after', END)
+        ))
 
 
 class CommentView(viewsets.ModelViewSet):
-    """Комментарии к аудиозаписи."""
+    """Комментарии к аудиозаписи.
+
+    С параметрами `?from_ms=&to_ms=` возвращаются только комментарии к
+    отрезку трека, по позиции; без них — вся ветка от новых к старым.
+    Оба порядка листаются курсором по своему индексу.
+    """
     serializer_class = serializers.CommentSerializer
+    pagination_class = Pagination
+    thread_ordering = ('-create_at', '-id')
+    window_ordering = ('position_ms', 'id')
+
+    @property
+    def ordering(self):
+        return self.window_ordering if self.get_window() else self.thread_ordering
+
+    def get_window(self):
+        """Границы отрезка (from_ms, to_ms) или None; любая граница может отсутствовать."""
+        bounds = []
+        for param in ('from_ms', 'to_ms'):
+            value = self.request.query_params.get(param)
+            if value in (None, ''):
+                bounds.append(None)
+                continue
+            try:
+                bounds.append(int(value))
+                if bounds[-1] < 0:
+                    raise ValueError
+            except ValueError:
+                raise ValidationError({param: 'Ожидается неотрицательное целое число миллисекунд.'})
+        if bounds == [None, None]:
+            return None
+        if None not in bounds and bounds[0] > bounds[1]:
+            raise ValidationError({'to_ms': 'Конец отрезка раньше начала.'})
+        return bounds
+
+    def get_queryset(self):
+        queryset = models.Comment.objects.filter(title_id=self.kwargs.get('title_id'))
+        window = self.get_window() if self.action == 'list' else None
+        if window is not None:
+            from_ms, to_ms = window
+            queryset = queryset.filter(position_ms__isnull=False)
+            if from_ms is not None:
+                queryset = queryset.filter(position_ms__gte=from_ms)
+            if to_ms is not None:
+                queryset = queryset.filter(position_ms__lte=to_ms)
+        return queryset
+
+
+class FeedView(viewsets.GenericViewSet):
+    """Лента новых аудиозаписей авторов, на которых подписан пользователь."""
+    serializer_class = serializers.TitleSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = Pagination
+    ordering = ('-create_at', '-id')
 
     def get_queryset(self):
-        return models.Comment.objects.filter(title_id=self.kwargs.get('title_id'))
+        return models.FeedItem.objects.filter(owner=self.request.user).select_related(
+            'title'
+        ).prefetch_related('title__genre')
+
+    def list(self, request):
+        pull_feed(request.user)
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer([item.title for item in page], many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class SearchView(viewsets.GenericViewSet):
+    """Поиск публичных аудиозаписей по названию, автору, альбому и жанру."""
+    serializer_class = serializers.TitleSerializer
+    default_limit = 20
+    max_limit = 50
+
+    def list(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'Поисковый запрос обязателен.'})
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+        titles = search_titles(query, max(limit, 1))
+        serializer = self.get_serializer(titles, many=True)
+        return Response(serializer.data)
+
+
+class SuggestView(viewsets.ViewSet):
+    """Подсказки при наборе: пользователи, аудиозаписи, альбомы и жанры по началу слова."""
+    limit = 10
+
+    def list(self, request):
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            return Response({'results': []})
+        return Response({'results': suggest(query, self.limit)})
+
+
+class UploadView(mixins.CreateModelMixin,
+                 mixins.RetrieveModelMixin,
+                 mixins.DestroyModelMixin,
+                 viewsets.GenericViewSet):
+    """Докачиваемая загрузка аудиозаписи частями.
+
+    POST создаёт сессию, PATCH с заголовком Upload-Offset дописывает часть,
+    HEAD/GET возвращает принятое смещение, finish создаёт аудиозапись.
+    """
+    serializer_class = serializers.UploadSerializer
+    permission_classes = (IsAuthenticated,)
+    chunk_content_type = 'application/offset+octet-stream'
+
+    def get_queryset(self):
+        return models.Upload.objects.filter(user=self.request.user)
+
+    def get_upload_headers(self, upload):
+        return {
+            'Upload-Offset': upload.offset,
+            'Upload-Length': upload.length,
+            'Cache-Control': 'no-store',
+        }
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response['Location'] = request.build_absolute_uri(f'{response.data["id"]}/')
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        upload = self.get_object()
+        serializer = self.get_serializer(upload)
+        return Response(serializer.data, headers=self.get_upload_headers(upload))
+
+    def partial_update(self, request, *args, **kwargs):
+        upload = self.get_object()
+        if request.content_type != self.chunk_content_type:
+            raise UnsupportedMediaType(request.content_type)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            raise ValidationError({'Upload-Offset': 'Заголовок Upload-Offset обязателен.'})
+        if offset != upload.offset:
+            return Response(status=status.HTTP_409_CONFLICT, headers=self.get_upload_headers(upload))
+
+        size = int(request.META.get('CONTENT_LENGTH') or 0)
+        if size > settings.UPLOAD_CHUNK_MAX_SIZE or offset + size > upload.length:
+            raise ValidationError({'Content-Length': 'Часть превышает допустимый размер.'})
+        if size:
+            try:
+                upload.offset = append_upload_chunk(upload, request.stream, size)
+            except UploadConflict:
+                upload.refresh_from_db()
+                return Response(status=status.HTTP_409_CONFLICT, headers=self.get_upload_headers(upload))
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=self.get_upload_headers(upload))
+
+    def perform_destroy(self, instance):
+        cancel_upload(instance)
+
+    @action(detail=True, methods=['post'])
+    def finish(self, request, pk=None):
+        upload = self.get_object()
+        if not upload.is_complete:
+            raise ValidationError('Файл загружен не полностью.')
+        serializer = serializers.UploadFinishSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        title = finish_upload(upload, **serializer.validated_data)
+        UPLOAD_DURATION.observe((timezone.now() - upload.create_at).total_seconds())
+        UPLOAD_SIZE.observe(upload.length)
+        data = serializers.TitleSerializer(title, context={'request': request}).data
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+def metrics(request):
+    """Метрики всех процессов сервера в текстовом формате Prometheus.
+
+    Без METRICS_TOKEN маршрут есть только при DEBUG, чтобы не открыть метрики через nginx.
+    """
+    if not settings.METRICS_ENABLED or not (settings.METRICS_TOKEN or settings.DEBUG):
+        raise Http404
+    if settings.METRICS_TOKEN and not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+    ):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(render_metrics(registry.collect()), content_type=METRICS_CONTENT_TYPE)
+
+
+def stream(request, name):
+    """Отдача по подписанной ссылке без nginx (разработка): та же проверка, что у secure_link."""
+    if not settings.STREAM_URL_SECRET:
+        raise Http404
+    error = check_stream_signature(
+        settings.STREAM_URL_PREFIX + name, request.GET.get('md5'), request.GET.get('expires')
+    )
+    if error is not None:
+        return HttpResponse(status=error)
+    field = models.Title._meta.get_field('file')
+    try:
+        return serve_media(request, field.attr_class(None, field, name), 'audio/mpeg')
+    except SuspiciousFileOperation:
+        raise Http404
+
+
+def thumbnail(request, name):
+    """Уменьшенная копия обложки или аватара, строится при первом запросе.
+
+    nginx отдаёт готовые копии с диска сам и обращается сюда только при промахе.
+    """
+    parsed = parse_thumbnail_name(name)
+    if parsed is None or parsed[0].startswith(THUMBNAIL_ROOT):
+        raise Http404
+    original, size, extension = parsed
+    storage = get_media_storage()
+    try:
+        if not storage.exists(original):
+            raise Http404
+        path = get_thumbnail(storage, original, size, extension)
+    except (OSError, SuspiciousFileOperation, Image.DecompressionBombError):
+        raise Http404
+    response = FileResponse(open(path, 'rb'), content_type=f'image/{extension}')
+    response['Cache-Control'] = 'public, max-age=2592000'
+    return response